@@ -0,0 +1,163 @@
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from calculators import TAX_RATE, build_screener
+from history_store import HistoryStore
+from market_calendar import weekly_schedule
+from market_data import QUOTE_CACHE_DB, QuoteSnapshot, SharedQuoteCache
+
+API_HOST = os.environ.get("API_HOST", "0.0.0.0")
+API_PORT = int(os.environ.get("API_PORT", 8502))  # 0 이면 main.py 가 API 를 띄우지 않음
+WEEK_TTL = 600  # main.py 의 load_dividend_week 캐시와 같은 주기
+DEFAULT_FIRE_TARGET = 50  # 만원
+
+
+# ---------------------------------------------------------
+# [API] Streamlit 옆에서 도는 읽기 전용 JSON API
+# - 시세는 main.py 폴러가 기록하는 공유 캐시(quote_cache.db)를 읽기만 한다
+#   → 보통은 main.py 가 웹 프로세스 안에서 같이 띄움 (start_in_background)
+#   → python api.py 로 따로 띄우면 QUOTE_CACHE_DB 가 웹 프로세스와 같은 파일이어야 함
+#     (컨테이너가 나뉘는 호스트에서는 공유 볼륨 경로로 지정)
+# - ETag = 주차 + 주간 데이터 내용 해시 + 스냅샷 버전 → 바뀐 게 없으면 304 (본문 없음)
+#   (같은 주차를 고쳐서 다시 반영해도 해시가 바뀌므로 클라이언트가 새 본문을 받음)
+# ---------------------------------------------------------
+class DividendAPI:
+    def __init__(self, store=None, shared=None):
+        self.store = store or HistoryStore()
+        self.store.import_week_file()  # main.py 와 같이 weekly_dividends.json 을 먼저 반영
+        self.shared = shared or SharedQuoteCache(QUOTE_CACHE_DB)
+        self._snapshot = QuoteSnapshot()
+        self._week = (None, {}, {}, "0")
+        self._week_loaded = 0.0
+        self._metrics = {}  # (버전, FIRE 목표) → 본문
+        self._lock = threading.Lock()
+
+    def week(self):
+        with self._lock:
+            if time.time() - self._week_loaded >= WEEK_TTL:
+                ex_date, data_map = self.store.load_week()
+                schedule = weekly_schedule(date.fromisoformat(ex_date)) if ex_date else {}
+                tag = f"{zlib.crc32(json.dumps(data_map, sort_keys=True).encode()):08x}"
+                self._week = (ex_date, data_map, schedule, tag)
+                self._week_loaded = time.time()
+            return self._week
+
+    # 새 버전이 있을 때만 파싱 (없으면 가지고 있던 스냅샷 그대로)
+    def snapshot(self):
+        with self._lock:
+            self._snapshot = self.shared.load(self._snapshot.version) or self._snapshot
+            return self._snapshot
+
+    def quotes_body(self, snap):
+        return {
+            "version": snap.version,
+            "fx": snap.fx,
+            "prices": snap.prices,
+            "changes": snap.changes,
+            "update_time": snap.update_time,
+            "fetched_at": snap.fetched_at,  # 경과 시간은 클라이언트가 계산 (304 여도 정확하도록)
+            "stale": sorted(snap.stale),
+            "degraded": snap.degraded,
+        }
+
+    def metrics_body(self, snap, data_map, tag, fire_target):
+        key = (snap.version, tag, fire_target)
+        with self._lock:
+            if key in self._metrics:
+                return self._metrics[key]
+        table = build_screener(data_map, snap.prices, snap.fx, TAX_RATE, fire_target * 10000)
+        body = {
+            "version": snap.version,
+            "fx": snap.fx,
+            "tax_rate": TAX_RATE,
+            "fire_target_man": fire_target,
+            "tickers": json.loads(table.to_json(orient="index")),
+        }
+        with self._lock:
+            # 이전 버전 결과는 다시 쓸 일이 없으므로 버림
+            self._metrics = {k: v for k, v in self._metrics.items() if k[:2] == (snap.version, tag)}
+            self._metrics[key] = body
+        return body
+
+    # (etag, 본문) - 없는 경로는 (None, None)
+    def route(self, path, query):
+        ex_date, data_map, schedule, tag = self.week()
+        if path == "/api/week":
+            return f'W/"{ex_date}-{tag}"', {"ex_date": ex_date, "schedule": schedule, "tickers": data_map}
+        snap = self.snapshot()
+        if path == "/api/quotes":
+            return f'W/"{ex_date}-{snap.version}"', self.quotes_body(snap)
+        if path == "/api/metrics":
+            try:
+                fire_target = max(1, int(query.get("fire", [DEFAULT_FIRE_TARGET])[0]))
+            except ValueError:
+                fire_target = DEFAULT_FIRE_TARGET
+            return f'W/"{ex_date}-{tag}-{snap.version}-{fire_target}"', self.metrics_body(snap, data_map, tag, fire_target)
+        return None, None
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    api = None  # serve() 에서 주입
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            etag, body = self.api.route(url.path.rstrip("/") or "/", parse_qs(url.query))
+        except Exception as e:
+            return self._send(500, {"error": str(e)})
+        if body is None:
+            return self._send(404, {"error": "not found", "paths": ["/api/week", "/api/quotes", "/api/metrics"]})
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            return self._send(304, None, etag)
+        return self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None):
+        payload = b"" if body is None else json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")  # 매번 ETag 로 재검증
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if status != 304:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        pass  # 폴링 요청마다 로그가 쌓이지 않도록
+
+
+def serve(host=API_HOST, port=API_PORT, api=None):
+    APIHandler.api = api or DividendAPI()
+    server = ThreadingHTTPServer((host, port), APIHandler)
+    server.daemon_threads = True
+    return server
+
+
+# 웹 프로세스 안에서 띄울 때 - 워커가 여럿이면 포트를 먼저 잡은 1개만 서빙
+def start_in_background(host=API_HOST, port=API_PORT):
+    if not port:
+        return None
+    try:
+        server = serve(host, port)
+    except OSError as e:
+        print(f"JSON API {host}:{port} 열기 실패: {e}", file=sys.stderr)
+        return None
+    threading.Thread(target=server.serve_forever, name="json-api", daemon=True).start()
+    return server
+
+
+# python api.py  (API_HOST / API_PORT 환경변수로 주소 변경)
+if __name__ == "__main__":
+    server = serve()
+    print(f"JSON API: http://{API_HOST}:{API_PORT}/api/week")
+    server.serve_forever()
@@ -0,0 +1,150 @@
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from calculators import HOLDING_ALIASES, PAYOUT_COLUMNS, TAX_RATE, account_payouts
+from history_store import HistoryStore
+from market_data import DEFAULT_FX, FX_TICKER, QUOTE_CACHE_DB, SharedQuoteCache
+
+CHUNK_BYTES = 16 * 1024 * 1024  # CSV 작업 1개가 읽는 크기 (워커당 메모리 상한)
+BATCH_COLUMNS = ["account", "ticker", "qty"]
+
+# 워커 프로세스마다 1번만 받는 계산 기준 (작업마다 피클링하지 않음)
+_div_map, _fx, _tax_rate = {}, DEFAULT_FX, TAX_RATE
+
+
+# ---------------------------------------------------------
+# [배치] 계좌별 주간 배당 (세전 / 세금 / 세후, 원) - 운영팀 명세서용 오프라인 계산
+# - 배당은 이번 주 DATA_MAP, 환율은 공유 시세 캐시(quote_cache.db) 마지막 값, 세율은 TAX_RATE
+# - CSV 는 줄 경계에 맞춘 바이트 구간, Parquet 은 row group 단위로 워커들이 직접 읽는다
+#   (부모는 구간 나누기 + 계좌별 부분합 더하기만 → 메모리는 계좌 수 + 작업 몇 개 분량)
+# ---------------------------------------------------------
+def _init_worker(div_map, fx, tax_rate):
+    global _div_map, _fx, _tax_rate
+    _div_map, _fx, _tax_rate = div_map, fx, tax_rate
+
+def _normalize(columns):
+    return [HOLDING_ALIASES.get(str(c).strip().lower(), str(c).strip().lower()) for c in columns]
+
+def csv_header(path, sep):
+    with open(path, "rb") as f:
+        header = f.readline()
+    columns = _normalize(header.decode("utf-8-sig").rstrip("\r\n").split(sep))
+    missing = set(BATCH_COLUMNS) - set(columns)
+    if missing:
+        raise ValueError(f"필수 열이 없습니다: {', '.join(sorted(missing))}")
+    return columns, len(header)
+
+# 헤더 다음부터 chunk_bytes 씩, 끝은 다음 줄바꿈까지 늘려서 줄이 잘리지 않게
+def csv_ranges(path, start, chunk_bytes=CHUNK_BYTES):
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield start, end
+            start = end
+
+def _csv_task(path, start, end, columns, sep):
+    import pandas as pd
+    with open(path, "rb") as f:
+        f.seek(start)
+        raw = f.read(end - start)
+    df = pd.read_csv(io.BytesIO(raw), sep=sep, header=None, names=columns, usecols=BATCH_COLUMNS,
+                     dtype={"account": str, "ticker": str}, skipinitialspace=True)
+    return account_payouts(df, _div_map, _fx, _tax_rate) + (len(df),)
+
+def _parquet_task(path, group):
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    names = dict(zip(_normalize(pf.schema_arrow.names), pf.schema_arrow.names))
+    df = pf.read_row_group(group, columns=[names[c] for c in BATCH_COLUMNS]).to_pandas()
+    df.columns = BATCH_COLUMNS
+    return account_payouts(df, _div_map, _fx, _tax_rate) + (len(df),)
+
+def parquet_groups(path):
+    import pyarrow.parquet as pq
+    pf = pq.ParquetFile(path)
+    missing = set(BATCH_COLUMNS) - set(_normalize(pf.schema_arrow.names))
+    if missing:
+        raise ValueError(f"필수 열이 없습니다: {', '.join(sorted(missing))}")
+    return range(pf.num_row_groups)
+
+
+def load_inputs(fx=None):
+    store = HistoryStore()
+    store.import_week_file()
+    ex_date, data_map = store.load_week()
+    if fx is None:
+        snap = SharedQuoteCache(QUOTE_CACHE_DB).load()
+        if snap is None or FX_TICKER not in snap.stamps:
+            print(f"⚠️ 저장된 환율이 없어 기본값 {DEFAULT_FX:,.0f}원으로 계산합니다 (--fx 로 지정 가능)", file=sys.stderr)
+            fx = DEFAULT_FX
+        else:
+            fx = snap.fx
+    return ex_date, {t: d["div"] for t, d in data_map.items()}, fx
+
+# 작업은 워커 수의 2배까지만 띄워서 (읽은 청크가 쌓이지 않게) 끝나는 대로 부분합에 더한다
+def run_batch(path, div_map, fx, tax_rate=TAX_RATE, workers=None, chunk_bytes=CHUNK_BYTES, sep=","):
+    import pandas as pd
+
+    if path.endswith(".parquet"):
+        tasks = ((_parquet_task, path, g) for g in parquet_groups(path))
+    else:
+        columns, header_len = csv_header(path, sep)
+        tasks = ((_csv_task, path, s, e, columns, sep) for s, e in csv_ranges(path, header_len, chunk_bytes))
+
+    workers = workers or os.cpu_count() or 1
+    total, rows, skipped = None, 0, 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(div_map, fx, tax_rate)) as pool:
+        pending = set()
+        for fn, *args in tasks:
+            pending.add(pool.submit(fn, *args))
+            if len(pending) < workers * 2:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for job in done:
+                part, bad, n = job.result()
+                total = part if total is None else total.add(part, fill_value=0)
+                rows, skipped = rows + n, skipped + bad
+        for job in pending:
+            part, bad, n = job.result()
+            total = part if total is None else total.add(part, fill_value=0)
+            rows, skipped = rows + n, skipped + bad
+
+    if total is None:
+        total = pd.DataFrame(columns=PAYOUT_COLUMNS).rename_axis("account")
+    total["positions"] = total["positions"].astype(int)
+    return total.sort_index(), rows, skipped
+
+def write_output(result, path):
+    if path.endswith(".parquet"):
+        result.reset_index().to_parquet(path, index=False)
+    else:
+        result.to_csv(path, float_format="%.2f", encoding="utf-8-sig" if path.endswith(".csv") else "utf-8")
+
+
+# python batch_payouts.py holdings.csv -o payouts.csv [--workers 8] [--fx 1400]
+# 입력 열: account(계좌), ticker(종목), qty(수량) - .parquet 도 가능
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="계좌별 주간 배당 일괄 계산 (세전 / 세금 / 세후, 원)")
+    parser.add_argument("input", help="보유 종목 CSV 또는 Parquet")
+    parser.add_argument("-o", "--output", default="payouts.csv", help=".csv 또는 .parquet")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 2**20, help="CSV 작업 1개 크기(MB)")
+    parser.add_argument("--sep", default=",", help="CSV 구분자")
+    parser.add_argument("--fx", type=float, default=None, help="환율 (없으면 공유 시세 캐시의 마지막 값)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ex_date, div_map, fx = load_inputs(args.fx)
+    result, rows, skipped = run_batch(args.input, div_map, fx, TAX_RATE, args.workers,
+                                      int(args.chunk_mb * 2**20), args.sep)
+    write_output(result, args.output)
+    print(f"{ex_date} 배당 · 환율 {fx:,.2f}원 · 세율 {TAX_RATE:.1%}")
+    print(f"{rows:,}행 → {len(result):,}개 계좌 ({skipped:,}행 제외: 모르는 종목 / 수량 없음) "
+          f"· {time.perf_counter() - started:.1f}초 → {args.output}")
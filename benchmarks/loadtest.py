@@ -0,0 +1,148 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import multiprocessing as mp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+REFRESH_LABEL = "🔄 실시간 시세 새로고침"
+TOTALS = ("upstream_seconds", "upstream_errors_total", "cache_lookups_total", "cache_misses_total")
+
+
+# ---------------------------------------------------------
+# [부하 테스트] 가짜 시세 공급자(QUOTE_PROVIDER=fake)로 N개 세션을 동시에 돌린다
+# - 세션마다 프로세스 1개 + AppTest 1개: 첫 화면 → 탭 순회 → 종목 변경 (+ 새로고침 버튼)
+#   (AppTest 는 전역 Runtime 을 실행마다 바꿔 끼워서 한 프로세스 안에서 동시에 못 돌림)
+# - 시세는 워커 여러 개로 띄운 서버처럼 공유 캐시(quote_cache.db)의 리더 1개만 받아옴
+# - 리런 지연 백분위 + 업스트림 호출 수 / 캐시 적중률(telemetry)을 모아서 출력
+# ---------------------------------------------------------
+def prepare(workdir, args):
+    history_db = os.path.join(workdir, "polygon_cache.db")
+    shutil.copy(os.path.join(ROOT, "polygon_cache.db"), history_db)
+    # market_data 가 import 될 때 공급자를 고르므로 import 전에 설정
+    os.environ.update({
+        "QUOTE_PROVIDER": "fake",
+        "FAKE_LATENCY": str(args.latency),
+        "FAKE_JITTER": str(args.jitter),
+        "FAKE_ERROR_RATE": str(args.error_rate),
+        "FAKE_VOLATILITY": str(args.volatility),
+        "FAKE_SEED": str(args.seed),
+        "QUOTE_CACHE_DB": os.path.join(workdir, "quote_cache.db"),
+        "HISTORY_DB": history_db,
+        "PORTFOLIO_DB": os.path.join(workdir, "portfolios.db"),
+        "API_PORT": "0",  # 세션 프로세스마다 API 포트를 잡으려 하지 않도록
+    })
+
+
+def run_session(index, args, start_gate, results):
+    sys.path.insert(0, ROOT)
+    import telemetry
+    from streamlit.testing.v1 import AppTest
+
+    timings = []  # (종류, 초)
+    errors = 0
+
+    def timed(kind, action):
+        nonlocal errors
+        started = time.perf_counter()
+        at = action()
+        timings.append((kind, time.perf_counter() - started))
+        errors += bool(at.exception)
+        return at
+
+    start_gate.wait()  # import 가 끝난 세션들이 동시에 시작
+    started = time.time()
+    at = timed("first", AppTest.from_file(MAIN, default_timeout=120).run)
+    tickers = list(at.selectbox(key="sel_ticker").options)
+    for r in range(args.rounds):
+        for tab in at.radio[0].options:
+            at = timed("tab", lambda: at.radio[0].set_value(tab).run())
+        ticker = tickers[(index + r) % len(tickers)]
+        at = timed("ticker", lambda: at.selectbox(key="sel_ticker").set_value(ticker).run())
+        if args.refresh_every and (r + 1) % args.refresh_every == 0:
+            button = next(b for b in at.button if b.label == REFRESH_LABEL)
+            at = timed("refresh", lambda: button.click().run())
+    results.put({
+        "timings": timings,
+        "errors": errors,
+        "span": (started, time.time()),
+        **{name: telemetry.metrics.totals(name) for name in TOTALS},
+    })
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q / 100 * len(values)))]
+    return {"n": len(values), "p50": pick(50), "p90": pick(90), "p99": pick(99), "max": values[-1]}
+
+
+def merge(results, name):
+    out = {}
+    for r in results:
+        for labels, n in r[name].items():
+            out[labels] = out.get(labels, 0) + n
+    return out
+
+
+def report(results, elapsed):
+    by_kind = {}
+    for r in results:
+        for kind, seconds in r["timings"]:
+            by_kind.setdefault(kind, []).append(seconds * 1000)
+    total = sum(len(v) for v in by_kind.values())
+
+    print(f"\n세션 {len(results)}개 / 리런 {total}회 / {elapsed:.1f}초 ({total / elapsed:.1f} 리런/초), "
+          f"예외 {sum(r['errors'] for r in results)}회")
+    print(f"{'종류':<8}{'n':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for kind in ("first", "tab", "ticker", "refresh", "all"):
+        values = [v for vs in by_kind.values() for v in vs] if kind == "all" else by_kind.get(kind)
+        if values:
+            p = percentiles(values)
+            print(f"{kind:<8}{p['n']:>6}{p['p50']:>9.0f}{p['p90']:>9.0f}{p['p99']:>9.0f}{p['max']:>9.0f}")
+
+    failed = merge(results, "upstream_errors_total")
+    print("\n업스트림 호출 (전 세션 합계)")
+    for labels, n in sorted(merge(results, "upstream_seconds").items()):
+        call = dict(labels)["call"]
+        errors = sum(v for k, v in failed.items() if dict(k)["call"] == call)
+        print(f"  {call:<18}{n:>6}회 (실패 {errors:.0f})")
+
+    misses = merge(results, "cache_misses_total")
+    print("\n캐시 적중률")
+    for labels, n in sorted(merge(results, "cache_lookups_total").items()):
+        miss = misses.get(labels, 0)
+        print(f"  {dict(labels)['cache']:<18}{n:>6.0f}회 조회, 적중 {(1 - miss / n) * 100 if n else 0:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 시세 공급자로 다중 세션 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=8, help="동시 세션 수")
+    parser.add_argument("--rounds", type=int, default=2, help="세션당 탭 순회 횟수")
+    parser.add_argument("--refresh-every", type=int, default=1, help="N 회 순회마다 새로고침 클릭 (0 이면 안 함)")
+    parser.add_argument("--latency", type=float, default=0.2, help="가짜 업스트림 평균 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--volatility", type=float, default=0.001, help="1분봉 로그수익률 표준편차")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="roundhill-load-") as workdir:
+        prepare(workdir, args)
+        ctx = mp.get_context("spawn")
+        start_gate, queue = ctx.Barrier(args.sessions), ctx.Queue()
+        procs = [ctx.Process(target=run_session, args=(i, args, start_gate, queue)) for i in range(args.sessions)]
+        for proc in procs:
+            proc.start()
+        results = [queue.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    report(results, max(r["span"][1] for r in results) - min(r["span"][0] for r in results))
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+# python benchmarks/loadtest.py [--sessions 8] [--rounds 2] [--latency 0.2] [--error-rate 0.05]
+if __name__ == "__main__":
+    sys.exit(main())
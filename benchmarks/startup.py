@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+HEAVY_MODULES = ("pandas", "pyarrow", "yfinance", "numpy")
+# main.py 가 직접 import 하는 로컬 모듈 (import 시간 회귀 확인용)
+APP_MODULES = ("templates", "market_calendar", "market_data", "history_store",
+               "calculators", "simulation", "portfolio_store")
+
+
+# ---------------------------------------------------------
+# [벤치마크] 콜드 스타트 → 첫 화면 렌더링까지 걸린 시간
+# - 매 회 새 파이썬 프로세스 (import 캐시 없음)
+# - DB 는 임시 폴더에 복사 / 시세는 고정 스냅샷을 미리 넣어 네트워크를 기다리지 않음
+# ---------------------------------------------------------
+def child(mode):
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest  # 테스트 도구 import 는 측정에서 제외
+
+    started = time.perf_counter()
+    if mode == "imports":
+        for name in APP_MODULES:
+            __import__(name)
+        result = {"seconds": time.perf_counter() - started, "exception": False}
+    else:
+        at = AppTest.from_file(MAIN, default_timeout=60).run()
+        result = {"seconds": time.perf_counter() - started, "exception": bool(at.exception)}
+    result["heavy"] = [m for m in HEAVY_MODULES if m in sys.modules]
+    print(json.dumps(result))
+
+
+def run_child(mode, env):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode],
+                         env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def prepare(workdir):
+    sys.path.insert(0, ROOT)
+    from market_data import FX_TICKER, QuoteSnapshot, SharedQuoteCache
+
+    with open(os.path.join(ROOT, "weekly_dividends.json"), encoding="utf-8") as f:
+        tickers = sorted(json.load(f)["tickers"])
+    now = time.time()
+    quote_db = os.path.join(workdir, "quote_cache.db")
+    SharedQuoteCache(quote_db).publish(QuoteSnapshot(
+        version=1, fx=1400.0, prices={t: 20.0 + i for i, t in enumerate(tickers)},
+        fetched_at=now, stamps={k: now for k in [FX_TICKER, *tickers]},
+    ))
+    history_db = os.path.join(workdir, "polygon_cache.db")
+    shutil.copy(os.path.join(ROOT, "polygon_cache.db"), history_db)
+    return {
+        **os.environ,
+        "QUOTE_CACHE_DB": quote_db,
+        "HISTORY_DB": history_db,
+        "PORTFOLIO_DB": os.path.join(workdir, "portfolios.db"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="콜드 스타트 첫 렌더링 시간 측정")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=0, help="중앙값이 이 값을 넘으면 실패 (0 이면 검사 안 함)")
+    parser.add_argument("--child", choices=["imports", "render"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child)
+
+    imports, renders = [], []
+    with tempfile.TemporaryDirectory(prefix="roundhill-bench-") as workdir:
+        env = prepare(workdir)
+        for i in range(args.runs):
+            imports.append(run_child("imports", env))
+            renders.append(run_child("render", env))
+            print(f"run {i + 1}: 모듈 import {imports[-1]['seconds'] * 1000:.0f}ms · "
+                  f"첫 렌더링 {renders[-1]['seconds'] * 1000:.0f}ms")
+
+    render_ms = [r["seconds"] * 1000 for r in renders]
+    median = statistics.median(render_ms)
+    print(f"\n첫 렌더링 중앙값 {median:.0f}ms (최소 {min(render_ms):.0f} / 최대 {max(render_ms):.0f})")
+    print(f"모듈 import 중앙값 {statistics.median(r['seconds'] for r in imports) * 1000:.0f}ms")
+    print(f"모듈 import 후 로딩된 무거운 패키지: {imports[-1]['heavy'] or '없음'}")
+    print(f"첫 렌더링 후 로딩된 무거운 패키지: {renders[-1]['heavy'] or '없음'}")
+    if any(r["exception"] for r in renders):
+        print("⚠️ 렌더링 중 예외 발생")
+        return 1
+    if args.budget_ms and median > args.budget_ms:
+        print(f"❌ 예산 {args.budget_ms:.0f}ms 초과")
+        return 1
+    return 0
+
+
+# python benchmarks/startup.py [--runs 5] [--budget-ms 4000]
+if __name__ == "__main__":
+    sys.exit(main())
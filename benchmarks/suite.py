@@ -0,0 +1,215 @@
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculators import (  # noqa: E402
+    TAX_RATE, averaging_calc, breakeven_calc, build_screener, dividend_calc, fire_calc, parse_holdings,
+    portfolio_summary, snowball_step,
+)
+from market_data import IntradayBars, QuoteSnapshot, parse_closes  # noqa: E402
+from simulation import WEEKS_PER_YEAR, simulate_snowball  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+THRESHOLD = 0.30  # 기준보다 30% 넘게 느려지면 실패
+REPEAT = 5
+MIN_TIME = 0.05  # 1회 측정이 이 시간 이상 걸리도록 반복 횟수 자동 조정
+FX = 1400.0
+SEED = 0
+
+
+# ---------------------------------------------------------
+# [벤치마크] 계산 코어 / 시세 파싱 핫패스 - Streamlit 없이 실행
+# - 케이스마다 (준비 → 측정할 함수) 를 등록, 최소 시간(REPEAT 회 중)을 호출당 초로 기록
+# - baselines.json 과 비교해서 THRESHOLD 넘게 느려진 케이스가 있으면 실패 (--update 로 갱신)
+# ---------------------------------------------------------
+CASES = {}
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def load_week():
+    with open(os.path.join(ROOT, "weekly_dividends.json"), encoding="utf-8") as f:
+        data_map = json.load(f)["tickers"]
+    # 연 분배율(rate)에서 역산한 주가 - 시세 없이도 현실적인 값
+    prices = {t: d["div"] * WEEKS_PER_YEAR / (d["rate"] / 100) for t, d in data_map.items()}
+    return data_map, prices
+
+
+@case("single_ticker")
+def single_ticker():
+    data_map, prices = load_week()
+    d, price = data_map["MSTW"], prices["MSTW"]
+    div_krw_net = d["div"] * FX * (1 - TAX_RATE)
+
+    def run():
+        dividend_calc(1000, d["div"], FX, TAX_RATE)
+        averaging_calc(price * 1.1, 100, 50, price, d["div"])
+        breakeven_calc(price, d["div"])
+        fire_calc(500000, div_krw_net, price, FX)
+        snowball_step(1000, div_krw_net, price * FX)
+    return run
+
+
+@case("all_tickers_batch")
+def all_tickers_batch():
+    data_map, prices = load_week()
+
+    def run():
+        build_screener(data_map, prices, FX, TAX_RATE, 500000)
+        for t, d in data_map.items():
+            div_krw_net = d["div"] * FX * (1 - TAX_RATE)
+            dividend_calc(1000, d["div"], FX, TAX_RATE)
+            breakeven_calc(prices[t], d["div"])
+            fire_calc(500000, div_krw_net, prices[t], FX)
+            snowball_step(1000, div_krw_net, prices[t] * FX)
+    return run
+
+
+@case("portfolio_1000")
+def portfolio_1000():
+    data_map, prices = load_week()
+    rng = np.random.default_rng(SEED)
+    tickers = rng.choice(sorted(data_map), 1000)
+    qty = rng.integers(1, 5000, 1000)
+    cost = rng.uniform(5, 60, 1000).round(2)
+    text = "ticker,qty,avg_cost\n" + "".join(f"{t},{q},{c}\n" for t, q, c in zip(tickers, qty, cost))
+
+    def run():
+        holdings = parse_holdings(io.StringIO(text))
+        portfolio_summary(holdings, data_map, prices, FX, TAX_RATE)
+    return run
+
+
+@case("snowball_30y_all")
+def snowball_30y_all():
+    data_map, prices = load_week()
+    tickers = sorted(data_map)
+    price_krw = np.array([prices[t] for t in tickers]) * FX
+    div_net = np.array([data_map[t]["div"] for t in tickers]) * FX * (1 - TAX_RATE)
+    return lambda: simulate_snowball(1000, price_krw, div_net, 30 * WEEKS_PER_YEAR, True)
+
+
+# yf.download 2일치 1분봉(프리~애프터) 종가 표와 같은 모양 → 분봉 버퍼 + 등락률 / 스파크라인
+@case("quote_parse")
+def quote_parse():
+    import pandas as pd
+
+    data_map, prices = load_week()
+    tickers = sorted(data_map)
+    day = pd.date_range("2026-01-05 09:00", periods=960, freq="1min", tz="UTC")
+    index = day.append(day + pd.Timedelta(days=1))
+    rng = np.random.default_rng(SEED)
+    walk = np.exp(np.cumsum(rng.normal(0, 0.001, (index.size, len(tickers))), axis=0))
+    closes = pd.DataFrame(walk * np.array([prices[t] for t in tickers]), index=index, columns=tickers)
+
+    def run():
+        bars = IntradayBars()
+        parse_closes(closes, tickers, bars)
+        for t in tickers:
+            bars.summary(t)
+    return run
+
+
+# 공유 캐시(SQLite)에 기록 / 다시 읽는 스냅샷 직렬화
+@case("snapshot_json")
+def snapshot_json():
+    data_map, prices = load_week()
+    now = time.time()
+    snap = QuoteSnapshot(
+        version=1, fx=FX, prices=prices, fetched_at=now, stamps={t: now for t in prices},
+        changes={t: 1.0 for t in prices}, sparks={t: [p] * 60 for t, p in prices.items()},
+    )
+    return lambda: QuoteSnapshot.from_json(snap.to_json())
+
+
+def measure(fn):
+    fn()  # 첫 호출(import / 캐시 준비)은 제외
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= MIN_TIME:
+            break
+        loops *= 2
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - started) / loops)
+    return best, loops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="계산 코어 / 시세 파싱 벤치마크 (기준 대비 회귀 검사)")
+    parser.add_argument("cases", nargs="*", help="실행할 케이스 (없으면 전체)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="허용 느려짐 비율 (0.3 = 30%%)")
+    parser.add_argument("--update", action="store_true", help="이번 결과로 기준 파일 갱신")
+    args = parser.parse_args()
+
+    if "streamlit" in sys.modules:
+        print("❌ 계산 코어가 streamlit 을 import 합니다")
+        return 1
+
+    names = args.cases or list(CASES)
+    unknown = set(names) - set(CASES)
+    if unknown:
+        parser.error(f"알 수 없는 케이스: {', '.join(sorted(unknown))}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("cases", {})
+
+    results, failed = {}, []
+    print(f"{'케이스':<20}{'호출당':>12}{'기준':>12}{'변화':>9}")
+    for name in names:
+        seconds, loops = measure(CASES[name]())
+        results[name] = {"seconds": seconds, "loops": loops}
+        base = baseline.get(name, {}).get("seconds")
+        if base:
+            ratio = seconds / base - 1
+            mark = ""
+            if ratio > args.threshold:
+                failed.append(name)
+                mark = " ❌"
+            print(f"{name:<20}{seconds * 1e6:>10.1f}µs{base * 1e6:>10.1f}µs{ratio:>+8.0%}{mark}")
+        else:
+            print(f"{name:<20}{seconds * 1e6:>10.1f}µs{'-':>12}{'':>9}")
+
+    if args.update:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "numpy": np.__version__,
+                "cases": dict(sorted(merged.items())),
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\n기준 갱신: {args.baseline}")
+        return 0
+    if failed:
+        print(f"\n❌ {args.threshold:.0%} 넘게 느려짐: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+# python benchmarks/suite.py [케이스 ...] [--update] [--threshold 0.3]
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import math
+
+import numpy as np
+
+TAX_RATE = 0.154  # 배당소득세 15.4%
+WEEKS_PER_YEAR = 52
+WEEKS_PER_MONTH = 4.3
+
+
+# ---------------------------------------------------------
+# [계산기] 탭별 계산 (Streamlit 없이 import 가능 - 벤치마크 / 배치에서 재사용)
+# - 반환 dict 의 키는 templates.py 카드의 자리표시자 이름과 같음
+# ---------------------------------------------------------
+def dividend_calc(shares, div, fx, tax_rate):
+    val_pre = shares * div * fx
+    val_tax = val_pre * tax_rate
+    return {"val_pre": val_pre, "val_tax": val_tax, "val_post": val_pre - val_tax}
+
+# 추가 매수 후 평단과, 배당만으로 원금을 회수하는 기간(주)이 얼마나 줄어드는지
+def averaging_calc(my_avg, my_qty, add_qty, price, div):
+    new_avg = (my_avg * my_qty + price * add_qty) / (my_qty + add_qty)
+    if div > 0:
+        old_w, new_w = my_avg / div, new_avg / div
+    else:
+        old_w, new_w = 0, 0
+    return {"new_avg": new_avg, "old_w": old_w, "new_w": new_w, "saved": old_w - new_w}
+
+def breakeven_calc(avg_cost, div):
+    w_need = max(0, avg_cost / div) if div > 0 else 0
+    return {"w_need": w_need, "m_need": w_need / WEEKS_PER_MONTH}
+
+def fire_calc(target_krw, div_krw_net, price, fx):
+    if div_krw_net <= 0:
+        return {"req_shares": 0, "req_money": 0}
+    req_shares = math.ceil(target_krw / div_krw_net)
+    return {"req_shares": req_shares, "req_money": req_shares * price * fx}
+
+# 이번 주 세후 배당으로 1주 단위 재투자 1번
+def snowball_step(shares, div_krw_net, price_krw):
+    this_pay = shares * div_krw_net
+    if price_krw <= 0:
+        return {"add_cnt": 0, "rem_cash": 0, "next_inc": 0}
+    add_cnt = math.floor(this_pay / price_krw)
+    return {"add_cnt": add_cnt, "rem_cash": this_pay - add_cnt * price_krw, "next_inc": add_cnt * div_krw_net}
+
+
+# ---------------------------------------------------------
+# [스크리너] 전 종목 지표를 DataFrame 한 번의 벡터 연산으로 계산
+# - 주가가 없는 종목은 주가가 필요한 지표만 NaN
+# ---------------------------------------------------------
+# pandas 는 표를 만들 때만 import (모듈 import 만으로는 로딩하지 않음)
+def build_screener(data_map, prices, fx, tax_rate, fire_target_krw):
+    import pandas as pd
+    df = pd.DataFrame.from_dict(data_map, orient="index")[["name", "div", "rate", "roc"]]
+    df["price"] = pd.Series(prices, dtype=float).reindex(df.index)
+    df.loc[df["price"] <= 0, "price"] = np.nan
+
+    div = df["div"].where(df["div"] > 0)
+    df["div_krw_net"] = df["div"] * fx * (1 - tax_rate)
+    df["yield_now"] = div * WEEKS_PER_YEAR / df["price"] * 100
+    df["bep_weeks"] = df["price"] / div
+    df["fire_shares"] = np.ceil(fire_target_krw / df["div_krw_net"].where(df["div_krw_net"] > 0))
+    df["fire_money"] = df["fire_shares"] * df["price"] * fx
+    df.index.name = "ticker"
+    return df.sort_values("yield_now", ascending=False, na_position="last")
+
+
+# ---------------------------------------------------------
+# [포트폴리오] 보유 종목 (ticker, qty, avg_cost) → 종목별 주간 배당 / ROC 반영 평단 / YOC
+# ---------------------------------------------------------
+HOLDING_COLUMNS = ["ticker", "qty", "avg_cost"]
+HOLDING_ALIASES = {
+    "종목": "ticker", "티커": "ticker", "symbol": "ticker",
+    "수량": "qty", "보유수량": "qty", "quantity": "qty", "shares": "qty",
+    "평단": "avg_cost", "평단가": "avg_cost", "매입가": "avg_cost", "cost": "avg_cost", "avg": "avg_cost",
+    "계좌": "account", "계좌번호": "account", "account_id": "account", "client": "account", "고객": "account",
+}
+
+# CSV / 엑셀에서 복사한 표(탭 구분) 모두 허용, 같은 종목은 수량 가중 평단으로 합침
+def parse_holdings(source):
+    import pandas as pd
+    df = pd.read_csv(source, sep=None, engine="python", skipinitialspace=True)
+    df.columns = [HOLDING_ALIASES.get(str(c).strip().lower(), str(c).strip().lower()) for c in df.columns]
+    missing = {"ticker", "qty"} - set(df.columns)
+    if missing:
+        raise ValueError(f"필수 열이 없습니다: {', '.join(sorted(missing))}")
+    if "avg_cost" not in df.columns:
+        df["avg_cost"] = np.nan
+    df = df[HOLDING_COLUMNS].copy()
+    df["ticker"] = df["ticker"].astype(str).str.strip().str.upper()
+    df["qty"] = pd.to_numeric(df["qty"], errors="coerce")
+    df["avg_cost"] = pd.to_numeric(df["avg_cost"], errors="coerce")
+    df = df[(df["ticker"] != "") & (df["qty"] > 0)]
+    return merge_holdings(df)
+
+def merge_holdings(df):
+    has_cost = df["avg_cost"] > 0
+    df = df.assign(cost_total=(df["qty"] * df["avg_cost"]).where(has_cost, 0.0), cost_qty=df["qty"].where(has_cost, 0.0))
+    grouped = df.groupby("ticker", sort=False).agg(qty=("qty", "sum"), cost_total=("cost_total", "sum"), cost_qty=("cost_qty", "sum"))
+    grouped["avg_cost"] = (grouped["cost_total"] / grouped["cost_qty"]).where(grouped["cost_qty"] > 0)
+    return grouped.reset_index()[HOLDING_COLUMNS]
+
+def portfolio_summary(holdings, data_map, prices, fx, tax_rate):
+    import pandas as pd
+    df = holdings.dropna(subset=["ticker", "qty"])
+    df = df[df["ticker"].isin(list(data_map)) & (df["qty"] > 0)].copy()
+    ref = pd.DataFrame.from_dict(data_map, orient="index")[["div", "roc"]]
+    df = df.join(ref, on="ticker")
+    cost = df["avg_cost"].where(df["avg_cost"] > 0)
+
+    df["pre_krw"] = df["qty"] * df["div"] * fx
+    df["post_krw"] = df["pre_krw"] * (1 - tax_rate)
+    # 배당 중 원금반환(ROC) 비율만큼은 돌려받은 원금이라 평단에서 뺀다
+    df["roc_cost"] = cost - df["div"] * df["roc"].fillna(0) / 100
+    df["yoc"] = df["div"] * WEEKS_PER_YEAR / cost * 100
+    df["value_krw"] = df["qty"] * df["ticker"].map(prices).where(lambda p: p > 0) * fx
+    return df.reset_index(drop=True)
+
+# 계좌별 주간 배당 합계 (배치 CLI) - holdings 열: account, ticker, qty / 주간 배당이 없는 종목은 제외
+# 합계 열은 모두 선형이라 청크별 결과를 그대로 더해도 전체 결과와 같다
+PAYOUT_COLUMNS = ["positions", "pre_krw", "tax_krw", "post_krw"]
+
+def account_payouts(holdings, div_map, fx, tax_rate):
+    import pandas as pd
+    ticker = holdings["ticker"].astype(str).str.strip().str.upper()
+    qty = pd.to_numeric(holdings["qty"], errors="coerce")
+    pre = qty * ticker.map(div_map) * fx
+    ok = pre.notna() & (qty > 0)
+    grouped = pre[ok].groupby(holdings["account"][ok].astype(str), sort=False).agg(["size", "sum"])
+    out = pd.DataFrame({"positions": grouped["size"], "pre_krw": grouped["sum"]})
+    out["tax_krw"] = out["pre_krw"] * tax_rate
+    out["post_krw"] = out["pre_krw"] - out["tax_krw"]
+    out.index.name = "account"
+    return out, int((~ok).sum())
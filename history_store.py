@@ -0,0 +1,260 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import telemetry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get("HISTORY_DB", os.path.join(BASE_DIR, "polygon_cache.db"))
+WEEK_FILE = os.path.join(BASE_DIR, "weekly_dividends.json")
+
+HISTORY_TTL = 6 * 3600  # 기본 6시간 (주 1회 배당이라 충분)
+
+# dividends_cache.data 는 기존 행과 같은 pandas split 형식 JSON
+HISTORY_COLUMNS = ["배당락일", "배당금(달러)"]
+
+
+# ---------------------------------------------------------
+# [저장소] SQLite 배당 이력 (WAL + 연결 재사용)
+# ---------------------------------------------------------
+class HistoryStore:
+    def __init__(self, path=DB_PATH, ttl=HISTORY_TTL, ttl_overrides=None):
+        self.path = path
+        self.ttl = ttl
+        self.ttl_overrides = dict(ttl_overrides or {})
+        # 세션 스레드들이 하나의 연결을 같이 쓰므로 락으로 직렬화
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS dividends_cache (
+                    ticker TEXT PRIMARY KEY,
+                    data TEXT,
+                    last_updated REAL
+                );
+                CREATE TABLE IF NOT EXISTS weekly_dividends (
+                    ex_date TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    div REAL NOT NULL,
+                    rate REAL,
+                    sec REAL,
+                    roc REAL,
+                    name TEXT,
+                    updated REAL,
+                    PRIMARY KEY (ex_date, ticker)
+                );
+                CREATE TABLE IF NOT EXISTS daily_prices (
+                    ticker TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    close REAL NOT NULL,
+                    PRIMARY KEY (ticker, day)
+                );
+            """)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------------
+    # [주간 배당] div / rate / sec / roc
+    # -----------------------------
+    def upsert_week(self, ex_date, data_map, replace=True):
+        now = time.time()
+        rows = [
+            (ex_date, t, v['div'], v.get('rate'), v.get('sec'), v.get('roc'), v.get('name'), now)
+            for t, v in data_map.items()
+        ]
+        conflict = """ON CONFLICT(ex_date, ticker) DO UPDATE SET
+            div=excluded.div, rate=excluded.rate, sec=excluded.sec,
+            roc=excluded.roc, name=excluded.name, updated=excluded.updated""" if replace else "ON CONFLICT DO NOTHING"
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO weekly_dividends (ex_date, ticker, div, rate, sec, roc, name, updated) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?) {conflict}",
+                rows,
+            )
+
+    # 가장 최근(또는 지정한) 주차 전 종목을 쿼리 1번으로
+    def load_week(self, ex_date=None):
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT ex_date, ticker, div, rate, sec, roc, name FROM weekly_dividends
+                WHERE ex_date = COALESCE(?, (SELECT MAX(ex_date) FROM weekly_dividends))
+            """, (ex_date,)).fetchall()
+        if not rows:
+            return None, {}
+        data_map = {
+            t: {'div': div, 'rate': rate, 'sec': sec, 'roc': roc, 'name': name}
+            for _, t, div, rate, sec, roc, name in rows
+        }
+        return rows[0][0], data_map
+
+    # ex_date 이후 주차들 [(배당락일, {종목: 배당 정보}), ...] - 원장이 새로 지급된 주만 반영할 때
+    def load_weeks_after(self, ex_date):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ex_date, ticker, div, roc FROM weekly_dividends WHERE ex_date > ? ORDER BY ex_date, ticker",
+                (ex_date or "",),
+            ).fetchall()
+        weeks = {}
+        for ex, t, div, roc in rows:
+            weeks.setdefault(ex, {})[t] = {'div': div, 'roc': roc}
+        return list(weeks.items())
+
+    def import_week_file(self, path=WEEK_FILE, replace=True):
+        with open(path, encoding="utf-8") as f:
+            week = json.load(f)
+        self.upsert_week(week["ex_date"], week["tickers"], replace=replace)
+        return week["ex_date"]
+
+    # -----------------------------
+    # [배당 이력] dividends_cache (종목별 TTL)
+    # -----------------------------
+    def ttl_for(self, ticker):
+        return self.ttl_overrides.get(ticker, self.ttl)
+
+    def expired(self, tickers, now=None):
+        now = now or time.time()
+        marks = ",".join("?" * len(tickers))
+        with self._lock:
+            seen = dict(self._conn.execute(
+                f"SELECT ticker, last_updated FROM dividends_cache WHERE ticker IN ({marks})", tuple(tickers)
+            ).fetchall())
+        return [t for t in tickers if now - (seen.get(t) or 0) >= self.ttl_for(t)]
+
+    # {ticker: [(배당락일 epoch ms, 배당금), ...]} - 날짜 오름차순
+    def get_history(self, tickers):
+        marks = ",".join("?" * len(tickers))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ticker, data FROM dividends_cache WHERE ticker IN ({marks})", tuple(tickers)
+            ).fetchall()
+        history = {}
+        for t, data in rows:
+            try:
+                history[t] = sorted((int(ts), float(v)) for ts, v in json.loads(data)["data"])
+            except (TypeError, ValueError, KeyError):
+                continue
+        return history
+
+    def upsert_history(self, history):
+        now = time.time()
+        rows = []
+        for t, points in history.items():
+            points = sorted(points, reverse=True)
+            blob = {"columns": HISTORY_COLUMNS, "index": list(range(len(points))), "data": [list(p) for p in points]}
+            rows.append((t, json.dumps(blob), now))
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO dividends_cache (ticker, data, last_updated) VALUES (?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET data=excluded.data, last_updated=excluded.last_updated
+            """, rows)
+
+    # TTL이 지난 종목만 받아와서 한 번에 저장
+    def sync_history(self, tickers, fetch=None):
+        fetch = fetch or fetch_dividend_history
+        history = {}
+        for t in self.expired(tickers):
+            try:
+                points = fetch(t)
+            except Exception:
+                continue
+            if points:
+                history[t] = points
+        if history:
+            self.upsert_history(history)
+        return list(history)
+
+    # -----------------------------
+    # [일별 종가] daily_prices (마지막 날짜 이후만 추가)
+    # -----------------------------
+    def last_price_days(self, tickers):
+        marks = ",".join("?" * len(tickers))
+        with self._lock:
+            return dict(self._conn.execute(
+                f"SELECT ticker, MAX(day) FROM daily_prices WHERE ticker IN ({marks}) GROUP BY ticker", tuple(tickers)
+            ).fetchall())
+
+    # {ticker: [("YYYY-MM-DD", 종가), ...]} - since 가 있으면 그 날짜 이후만
+    def get_prices(self, tickers, since=None):
+        marks = ",".join("?" * len(tickers))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ticker, day, close FROM daily_prices WHERE ticker IN ({marks}) AND day > ? ORDER BY day",
+                (*tickers, since or ""),
+            ).fetchall()
+        prices = {}
+        for t, day, close in rows:
+            prices.setdefault(t, []).append((day, close))
+        return prices
+
+    # day 당일(없으면 max_age_days 일 전까지 가장 가까운 날) 종가 - 지급일 환율 조회용
+    # 그보다 오래된 종가밖에 없으면 (아직 동기화 전) None
+    def close_on(self, ticker, day, max_age_days=2):
+        oldest = (date.fromisoformat(day) - timedelta(days=max_age_days)).isoformat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT close FROM daily_prices WHERE ticker = ? AND day BETWEEN ? AND ? ORDER BY day DESC LIMIT 1",
+                (ticker, oldest, day),
+            ).fetchone()
+        return row[0] if row else None
+
+    def upsert_prices(self, prices):
+        rows = [(t, day, close) for t, points in prices.items() for day, close in points]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO daily_prices (ticker, day, close) VALUES (?, ?, ?)
+                ON CONFLICT(ticker, day) DO UPDATE SET close=excluded.close
+            """, rows)
+
+    # 종목별 마지막 저장일부터 한 번의 요청으로 받아서 새 날짜만 저장
+    def sync_prices(self, tickers, fetch=None):
+        fetch = fetch or fetch_daily_prices
+        last = self.last_price_days(tickers)
+        start = None if len(last) < len(tickers) else min(last.values())
+        try:
+            fetched = fetch(tickers, start)
+        except Exception:
+            return 0
+        fresh = {t: [p for p in points if p[0] >= last.get(t, "")] for t, points in fetched.items()}
+        self.upsert_prices(fresh)
+        return sum(len(v) for v in fresh.values())
+
+
+# -----------------------------
+# [함수] Yahoo 배당 이력 조회
+# -----------------------------
+# yfinance 는 백그라운드 동기화에서만 쓰므로 여기서 import
+@telemetry.upstream("yahoo_dividends")
+def fetch_dividend_history(ticker):
+    import yfinance as yf
+    divs = yf.Ticker(ticker).dividends
+    return [(int(ts.timestamp() * 1000), float(v)) for ts, v in divs.items()]
+
+# start 가 None 이면 상장 이후 전체 (마지막 날은 장중 값일 수 있어 다시 받아 덮어씀)
+@telemetry.upstream("yahoo_daily")
+def fetch_daily_prices(tickers, start=None):
+    import yfinance as yf
+    kwargs = {"start": start} if start else {"period": "max"}
+    data = yf.download(list(tickers), interval="1d", auto_adjust=False, progress=False, threads=False, **kwargs)
+    if data.empty:
+        return {}
+    closes = data["Close"]
+    return {
+        t: [(ts.strftime("%Y-%m-%d"), float(v)) for ts, v in closes[t].dropna().items()]
+        for t in tickers if t in closes
+    }
+
+
+# 주간 배당 파일을 DB에 반영: python history_store.py weekly_dividends.json
+if __name__ == "__main__":
+    store = HistoryStore()
+    path = sys.argv[1] if len(sys.argv) > 1 else WEEK_FILE
+    print(f"{store.import_week_file(path)} 주차 반영 완료")
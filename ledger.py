@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from calculators import TAX_RATE
+from market_calendar import pay_date
+from market_data import FX_TICKER
+from portfolio_store import PORTFOLIO_DB
+
+TOTAL_FIELDS = ("entries", "pre_krw", "tax_krw", "post_krw", "roc_krw", "roc_per_share")
+FX_MAX_AGE_DAYS = 2  # 유예 기간이 지난 뒤 대신 쓰는 가장 오래된 종가 (지급일 - N일, FX 휴장일 대비)
+FX_GRACE_DAYS = 3    # 지급일 환율이 아직 없으면 이 기간 동안은 기록을 미룸 (동기화 대기)
+
+
+# ---------------------------------------------------------
+# [원장] 토큰별 주간 배당 기록 + 누적 집계 (portfolios.db)
+# - 지급일이 지난 주만, 그 주의 배당 / 지급일 환율 / 당시 보유 수량으로 1줄씩 기록
+# - 기록할 때 같은 트랜잭션에서 집계 행(연 / 월 / 종목)에 더해 둔다
+#   → 화면은 집계 테이블만 읽으므로 이력 길이와 무관하게 조회 1번
+# - 집계 범위: year = 지급일 연도(YTD), month = 지급 월, ticker = 종목별 전체 누적(ROC 평단 차감 포함)
+# ---------------------------------------------------------
+class DividendLedger:
+    def __init__(self, path=PORTFOLIO_DB, tax_rate=TAX_RATE):
+        self.path = path
+        self.tax_rate = tax_rate
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS ledger_entries (
+                    token TEXT NOT NULL,
+                    ex_date TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    pay_date TEXT NOT NULL,
+                    qty REAL NOT NULL,
+                    div REAL NOT NULL,
+                    roc REAL,
+                    fx REAL NOT NULL,
+                    pre_krw REAL NOT NULL,
+                    tax_krw REAL NOT NULL,
+                    post_krw REAL NOT NULL,
+                    roc_krw REAL NOT NULL,
+                    recorded REAL,
+                    PRIMARY KEY (token, ex_date, ticker)
+                );
+                CREATE TABLE IF NOT EXISTS ledger_totals (
+                    token TEXT NOT NULL,
+                    scope TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    entries INTEGER NOT NULL,
+                    pre_krw REAL NOT NULL,
+                    tax_krw REAL NOT NULL,
+                    post_krw REAL NOT NULL,
+                    roc_krw REAL NOT NULL,
+                    roc_per_share REAL NOT NULL,
+                    PRIMARY KEY (token, scope, key)
+                );
+                CREATE TABLE IF NOT EXISTS ledger_cursor (
+                    token TEXT PRIMARY KEY,
+                    last_ex_date TEXT NOT NULL
+                );
+            """)
+            self._conn.commit()
+
+    # 마지막으로 반영한 배당락일 (처음 보는 토큰이면 None)
+    def cursor(self, token):
+        with self._lock:
+            row = self._conn.execute("SELECT last_ex_date FROM ledger_cursor WHERE token = ?", (token,)).fetchone()
+        return row[0] if row else None
+
+    # 처음 보는 토큰은 이번 주부터 기록 (지금 보유 수량으로 과거 주를 채우면 틀린 값이 되므로)
+    def start(self, token, ex_date):
+        before = (date.fromisoformat(ex_date) - timedelta(days=1)).isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO ledger_cursor (token, last_ex_date) VALUES (?, ?)", (token, before))
+        return self.cursor(token)
+
+    # 한 주치 기록 + 집계 갱신 + 커서 이동을 한 트랜잭션으로 (이미 있는 줄은 건너뜀 → 다시 불러도 안전)
+    def record(self, token, ex_date, paid, holdings, week, fx):
+        now = time.time()
+        with self._lock, self._conn:
+            for ticker, qty in holdings.items():
+                d = week.get(ticker)
+                if d is None or qty <= 0:
+                    continue
+                pre = qty * d['div'] * fx
+                tax = pre * self.tax_rate
+                roc_per_share = d['div'] * (d['roc'] or 0) / 100
+                cur = self._conn.execute("""
+                    INSERT OR IGNORE INTO ledger_entries
+                        (token, ex_date, ticker, pay_date, qty, div, roc, fx, pre_krw, tax_krw, post_krw, roc_krw, recorded)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (token, ex_date, ticker, paid.isoformat(), qty, d['div'], d['roc'], fx,
+                      pre, tax, pre - tax, qty * roc_per_share * fx, now))
+                if cur.rowcount == 0:
+                    continue
+                values = (1, pre, tax, pre - tax, qty * roc_per_share * fx, roc_per_share)
+                for scope, key in (("year", f"{paid.year}"), ("month", f"{paid:%Y-%m}"), ("ticker", ticker)):
+                    self._conn.execute("""
+                        INSERT INTO ledger_totals (token, scope, key, entries, pre_krw, tax_krw, post_krw, roc_krw, roc_per_share)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(token, scope, key) DO UPDATE SET
+                            entries = entries + excluded.entries,
+                            pre_krw = pre_krw + excluded.pre_krw,
+                            tax_krw = tax_krw + excluded.tax_krw,
+                            post_krw = post_krw + excluded.post_krw,
+                            roc_krw = roc_krw + excluded.roc_krw,
+                            roc_per_share = roc_per_share + excluded.roc_per_share
+                    """, (token, scope, key, *values))
+            self._conn.execute("""
+                INSERT INTO ledger_cursor (token, last_ex_date) VALUES (?, ?)
+                ON CONFLICT(token) DO UPDATE SET last_ex_date = MAX(last_ex_date, excluded.last_ex_date)
+            """, (token, ex_date))
+
+    # 집계 행만 읽음: {"ytd": {...} 또는 None, "months": {"2026-01": {...}}, "tickers": {"MSTW": {...}}}
+    def totals(self, token, year):
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT scope, key, {", ".join(TOTAL_FIELDS)} FROM ledger_totals
+                WHERE token = ? AND (scope = 'ticker' OR (scope = 'year' AND key = ?) OR (scope = 'month' AND key LIKE ?))
+                ORDER BY scope, key
+            """, (token, f"{year}", f"{year}-%")).fetchall()
+        out = {"ytd": None, "months": {}, "tickers": {}}
+        for scope, key, *values in rows:
+            item = dict(zip(TOTAL_FIELDS, values))
+            if scope == "year":
+                out["ytd"] = item
+            elif scope == "month":
+                out["months"][key] = item
+            else:
+                out["tickers"][key] = item
+        return out
+
+
+# 커서 이후 주차 중 지급일이 지난 주만 순서대로 반영 (보통은 새 주가 없어 조회 2번으로 끝)
+# - 지급일 당일은 환율 종가가 확정 전(장중 값 / 며칠 전 값)이라 다음 날부터 반영
+# - 환율은 지급일 당일 USDKRW 종가(일별 종가 테이블)만 인정하고, 없으면 그 주부터 기록을 미룸
+#   지급일 뒤 FX_GRACE_DAYS 가 지나도 없으면 FX_MAX_AGE_DAYS 이내 가장 가까운 종가, 그것도 없으면 지금 환율(fx_now)
+#   → 한 번 기록한 줄은 바뀌지 않으므로 이때는 그 대체 환율이 그 주의 환율로 남는다
+# - 수량은 반영 시점에 저장된 보유 수량 (지급일 뒤 처음 열었을 때 기준)
+#   load_holdings() → {종목: 수량} 은 실제로 반영할 주가 있을 때만 부른다
+def catch_up(ledger, store, token, load_holdings, current_ex_date, fx_now, today):
+    last = ledger.cursor(token) or ledger.start(token, current_ex_date)
+    holdings = None
+    recorded = 0
+    for ex_date, week in store.load_weeks_after(last):
+        paid = pay_date(date.fromisoformat(ex_date))
+        if paid >= today:
+            break
+        fx = store.close_on(FX_TICKER, paid.isoformat(), 0)
+        if fx is None:
+            if (today - paid).days < FX_GRACE_DAYS:
+                break
+            fx = store.close_on(FX_TICKER, paid.isoformat(), FX_MAX_AGE_DAYS) or fx_now
+        if holdings is None:
+            holdings = load_holdings()
+        ledger.record(token, ex_date, paid, holdings, week, fx)
+        recorded += 1
+    return recorded
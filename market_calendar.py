@@ -0,0 +1,208 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import pytz
+
+NY_TZ = pytz.timezone('America/New_York')
+KST = pytz.timezone('Asia/Seoul')
+
+# 세션 코드 → (뱃지 문구, CSS 클래스)
+SESSION_LABELS = {
+    "weekend": ("⛔ 휴장 (주말)", "status-closed"),
+    "holiday": ("⛔ 휴장 (공휴일)", "status-closed"),
+    "closed": ("⛔ 장마감 (조기폐장)", "status-closed"),
+    "pre": ("🌅 프리마켓 (Pre-Market)", "status-pre"),
+    "regular": ("🔥 정규장 (Open)", "status-open"),
+    "after": ("🌙 애프터마켓 (After)", "status-after"),
+    "day": ("☀️ 데이마켓 (Day Market)", "status-day"),
+}
+
+# 세션별 시세 갱신 주기(초) - None 은 휴장이라 다음 세션 시작까지 폴링 안 함
+POLL_INTERVALS = {
+    "regular": 15,
+    "pre": 60,
+    "after": 60,
+    "day": 120,
+    "weekend": None,
+    "holiday": None,
+    "closed": None,
+}
+
+# 세션 경계 (뉴욕 기준 분) - 조기폐장일은 13시 정규장 마감, 17시 애프터 마감
+PRE_OPEN, REGULAR_OPEN, REGULAR_CLOSE, DAY_OPEN = 240, 570, 960, 1200
+EARLY_CLOSE, EARLY_AFTER_CLOSE = 780, 1020
+
+WEEKDAY_KR = "월화수목금토일"
+
+
+# ---------------------------------------------------------
+# [휴장일] NYSE 규칙으로 연도별 계산 (연도당 1번만 계산해서 캐시)
+# ---------------------------------------------------------
+def _nth_weekday(year, month, weekday, n):
+    first = date(year, month, 1)
+    return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+
+def _last_weekday(year, month, weekday):
+    last = date(year, month + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+# 부활절 (그레고리력, 익명 알고리즘)
+def _easter(year):
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+# 토요일 → 금요일, 일요일 → 월요일 대체휴일
+def _observed(d):
+    if d.weekday() == 5: return d - timedelta(days=1)
+    if d.weekday() == 6: return d + timedelta(days=1)
+    return d
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year):
+    days = {
+        _nth_weekday(year, 1, 0, 3),            # 마틴 루터 킹 데이
+        _nth_weekday(year, 2, 0, 3),            # 대통령의 날
+        _easter(year) - timedelta(days=2),      # 성금요일
+        _last_weekday(year, 5, 0),              # 메모리얼 데이
+        _observed(date(year, 7, 4)),            # 독립기념일
+        _nth_weekday(year, 9, 0, 1),            # 노동절
+        _nth_weekday(year, 11, 3, 4),           # 추수감사절
+        _observed(date(year, 12, 25)),          # 크리스마스
+    }
+    # 신정: 토요일이면 전년도 12/31 로 당기지 않음 (NYSE 규칙)
+    new_year = date(year, 1, 1)
+    if new_year.weekday() == 6:
+        days.add(new_year + timedelta(days=1))
+    elif new_year.weekday() < 5:
+        days.add(new_year)
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # 준틴스
+    return frozenset(days)
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year):
+    holidays = nyse_holidays(year)
+    candidates = {
+        date(year, 7, 3),                                       # 독립기념일 전날
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),       # 블랙프라이데이
+        date(year, 12, 24),                                     # 크리스마스 이브
+    }
+    return frozenset(d for d in candidates if d.weekday() < 5 and d not in holidays)
+
+def is_trading_day(d):
+    return d.weekday() < 5 and d not in nyse_holidays(d.year)
+
+def next_trading_day(d):
+    d += timedelta(days=1)
+    while not is_trading_day(d):
+        d += timedelta(days=1)
+    return d
+
+def previous_trading_day(d):
+    d -= timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d
+
+# 해당 날짜의 정규장 / 애프터 마감 (분)
+def _closes(d):
+    if d in nyse_early_closes(d.year):
+        return EARLY_CLOSE, EARLY_AFTER_CLOSE
+    return REGULAR_CLOSE, DAY_OPEN
+
+
+# -----------------------------
+# [함수] 세션 판정 (뉴욕 현지 시각 기준)
+# - 20시 이후 데이마켓은 다음 날 거래일에 속한 세션으로 본다
+# -----------------------------
+def session_at(now_ny):
+    minutes = now_ny.hour * 60 + now_ny.minute
+    today = now_ny.date()
+    trade_date = today + timedelta(days=1) if minutes >= DAY_OPEN else today
+
+    if not is_trading_day(trade_date):
+        return "weekend" if trade_date.weekday() >= 5 else "holiday"
+    if minutes >= DAY_OPEN or minutes < PRE_OPEN:
+        return "day"
+
+    close, after_close = _closes(today)
+    if minutes < REGULAR_OPEN: return "pre"
+    elif minutes < close: return "regular"
+    elif minutes < after_close: return "after"
+    else: return "closed"
+
+
+# 현재 세션과 다음 세션이 시작되는 시각(뉴욕 tz-aware)
+def market_session(now=None):
+    now_ny = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    current = session_at(now_ny)
+    day = now_ny.date()
+    for _ in range(8):  # 연휴 + 주말을 넘어도 일주일 안에 반드시 바뀜
+        for m in sorted({0, PRE_OPEN, REGULAR_OPEN, *_closes(day), DAY_OPEN}):
+            at = NY_TZ.localize(datetime(day.year, day.month, day.day, m // 60, m % 60))
+            if at > now_ny and session_at(at) != current:
+                return current, at
+        day += timedelta(days=1)
+    return current, None
+
+
+# 뱃지는 현재 세션만 필요하므로 다음 세션 탐색 없이 바로 판정
+def get_us_market_status(now=None):
+    now_ny = (now or datetime.now(NY_TZ)).astimezone(NY_TZ)
+    return SESSION_LABELS[session_at(now_ny)]
+
+
+# 다음 폴링까지 쉴 시간(초): 세션 주기와 다음 세션 시작 중 빠른 쪽
+def next_poll_delay(now=None):
+    now = now or datetime.now(NY_TZ)
+    session, change_at = market_session(now)
+    until_change = (change_at - now).total_seconds() if change_at else None
+    interval = POLL_INTERVALS[session]
+    if interval is None:
+        return until_change
+    if until_change is None:
+        return interval
+    return min(interval, until_change)
+
+
+# ---------------------------------------------------------
+# [일정] 주간 배당 일정 (배당락일 기준으로 계산)
+# ---------------------------------------------------------
+def _kst_label(d, with_time=None):
+    label = f"{d.month}/{d.day}({WEEKDAY_KR[d.weekday()]})"
+    return f"{label} {with_time}" if with_time else label
+
+# 배당락일이 속한 주의 첫 거래일 (월요일이 휴장이면 화요일)
+def weekly_ex_date(d):
+    monday = d - timedelta(days=d.weekday())
+    return monday if is_trading_day(monday) else next_trading_day(monday)
+
+# "1월 2주차" (월요일 시작 주 기준)
+def week_label(d):
+    return f"{d.month}월 {(d.day + date(d.year, d.month, 1).weekday() - 1) // 7 + 1}주차"
+
+# 지급일 = 배당락일 다음 거래일
+def pay_date(ex_date):
+    return next_trading_day(weekly_ex_date(ex_date))
+
+# T+1 결제: 배당락일 전 거래일 정규장 마감까지 사야 함 (한국 시간으로 표시)
+def weekly_schedule(ex_date):
+    ex_date = weekly_ex_date(ex_date)
+    last_buy = previous_trading_day(ex_date)
+    close_min = _closes(last_buy)[0]
+    close_ny = NY_TZ.localize(datetime(last_buy.year, last_buy.month, last_buy.day, close_min // 60, close_min % 60))
+    close_kst = close_ny.astimezone(KST)
+    return {
+        "buy_limit": _kst_label(close_kst.date(), close_kst.strftime("%H:%M")),
+        "ex_date": _kst_label(ex_date),
+        "pay_date": _kst_label(pay_date(ex_date)),
+        "week_label": week_label(ex_date),
+    }
@@ -0,0 +1,677 @@
+import json
+import math
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import asdict, dataclass, field, replace
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+import telemetry
+
+KST = pytz.timezone('Asia/Seoul')
+NY_TZ = pytz.timezone('America/New_York')
+FX_TICKER = "USDKRW=X"
+DEFAULT_FX = 1440.0
+FX_TIMEOUT = 4.0
+PRICE_TIMEOUT = 8.0
+FOLLOW_INTERVAL = 2.0  # 팔로워 워커가 공유 캐시를 다시 읽는 주기
+# 같은 서버의 워커들(+ api.py)이 공유하는 시세 캐시 파일
+QUOTE_CACHE_DB = os.environ.get("QUOTE_CACHE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "quote_cache.db"))
+BAR_CAPACITY = 2048    # 종목당 1분봉 보관 개수 (프리~애프터 16시간 x 2일)
+BAR_LOOKBACK = 5 * 86400  # 마지막 봉이 이보다 오래됐으면 이어받지 않고 새로 받음
+SPARK_POINTS = 60
+REGULAR_CLOSE_MIN = 960  # 뉴욕 16:00 (전일 종가 기준)
+QUOTE_PROVIDER = os.environ.get("QUOTE_PROVIDER", "yahoo")  # yahoo | fake (부하 테스트용)
+
+# 환율/시세 동시 조회용 (마감 시간을 넘긴 호출은 버리고 다음 주기에 재시도)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="quote-fetch")
+
+
+# ---------------------------------------------------------
+# [데이터] 시세 스냅샷 (불변 객체 - 읽을 때 락이 필요 없음)
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class QuoteSnapshot:
+    version: int = 0
+    fx: float = DEFAULT_FX
+    prices: dict = field(default_factory=dict)
+    fetched_at: float = 0.0  # epoch 초 (0이면 아직 수신 전)
+    stamps: dict = field(default_factory=dict)  # 종목(환율 포함)별 마지막 수신 시각
+    stale: frozenset = frozenset()  # 마지막 조회에서 제때 못 받은 항목
+    degraded: bool = False  # 업스트림 장애로 마지막 정상값(LKG)을 서빙 중
+    changes: dict = field(default_factory=dict)  # 종목별 전일 종가 대비 등락률(%)
+    sparks: dict = field(default_factory=dict)  # 종목별 당일 1분봉 종가 (SPARK_POINTS 개로 축약)
+
+    @property
+    def update_time(self):
+        if not self.fetched_at:
+            return "--:--:--"
+        return datetime.fromtimestamp(self.fetched_at, KST).strftime("%H:%M:%S")
+
+    def age(self, now=None):
+        if not self.fetched_at:
+            return float("inf")
+        return (now or time.time()) - self.fetched_at
+
+    def ticker_age(self, key, now=None):
+        ts = self.stamps.get(key)
+        if not ts:
+            return float("inf")
+        return (now or time.time()) - ts
+
+    # 한 번도 못 받았거나 마지막 조회에 실패한 값은 stale
+    def is_stale(self, key):
+        return key in self.stale or key not in self.stamps
+
+    def to_json(self):
+        return json.dumps({**asdict(self), "stale": sorted(self.stale)})
+
+    @classmethod
+    def from_json(cls, payload):
+        data = json.loads(payload)
+        data["stale"] = frozenset(data.get("stale", ()))
+        return cls(**data)
+
+
+# ---------------------------------------------------------
+# [분봉] 종목별 1분봉 링버퍼 (epoch 초 / 종가 배열 2개)
+# - 마지막 봉 이후만 받아서 덧붙이고, 진행 중인 마지막 봉은 덮어쓴다
+# ---------------------------------------------------------
+class IntradayBars:
+    def __init__(self, capacity=BAR_CAPACITY):
+        self.capacity = capacity
+        self._ts = {}
+        self._close = {}
+        self._count = {}  # 지금까지 쓴 봉 개수 (쓰기 위치 = count % capacity)
+        self._lock = threading.Lock()
+
+    def last_ts(self, ticker):
+        n = self._count.get(ticker, 0)
+        return int(self._ts[ticker][(n - 1) % self.capacity]) if n else None
+
+    # 여러 종목을 한 번에 이어받을 시작 시각 (하나라도 비어 있으면 None)
+    def since(self, tickers):
+        stamps = [self.last_ts(t) for t in tickers]
+        if not stamps or None in stamps:
+            return None
+        return min(stamps)
+
+    # (이어받을 종목, 처음부터 받을 종목) - 봉이 없거나 마지막 봉이 lookback 보다 오래된 종목만 뒤쪽
+    def split(self, tickers, now=None, lookback=BAR_LOOKBACK):
+        now = now or time.time()
+        warm, cold = [], []
+        for t in tickers:
+            last = self.last_ts(t)
+            (warm if last is not None and now - last <= lookback else cold).append(t)
+        return warm, cold
+
+    def extend(self, ticker, ts, close):
+        ts = np.asarray(ts, dtype=np.int64)
+        close = np.asarray(close, dtype=float)
+        with self._lock:
+            if ticker not in self._ts:
+                self._ts[ticker] = np.zeros(self.capacity, dtype=np.int64)
+                self._close[ticker] = np.zeros(self.capacity)
+                self._count[ticker] = 0
+            n = self._count[ticker]
+            last = self.last_ts(ticker)
+            if last is not None:
+                # 마지막 봉과 같은 시각은 갱신, 그 이전은 버림
+                same = ts == last
+                if same.any():
+                    self._close[ticker][(n - 1) % self.capacity] = close[same][-1]
+                keep = ts > last
+                ts, close = ts[keep], close[keep]
+            ts, close = ts[-self.capacity:], close[-self.capacity:]
+            idx = (n + np.arange(ts.size)) % self.capacity
+            self._ts[ticker][idx] = ts
+            self._close[ticker][idx] = close
+            self._count[ticker] = n + ts.size
+
+    # 시간순으로 정렬된 (epoch 초, 종가) 사본
+    def bars(self, ticker):
+        with self._lock:
+            n = self._count.get(ticker, 0)
+            if not n:
+                return np.empty(0, dtype=np.int64), np.empty(0)
+            if n <= self.capacity:
+                return self._ts[ticker][:n].copy(), self._close[ticker][:n].copy()
+            head = n % self.capacity
+            return np.roll(self._ts[ticker], -head), np.roll(self._close[ticker], -head)
+
+    def latest(self, ticker):
+        n = self._count.get(ticker, 0)
+        return float(self._close[ticker][(n - 1) % self.capacity]) if n else None
+
+    # 마지막 봉이 속한 뉴욕 날짜의 봉들과 그 전 날 정규장 종가
+    def _session(self, ticker):
+        ts, close = self.bars(ticker)
+        if not ts.size:
+            return None, close
+        day_start = _ny_epoch(datetime.fromtimestamp(ts[-1], NY_TZ).date())
+        today = ts >= day_start
+        prev = np.flatnonzero(~today)
+        if prev.size:
+            prev_close = _ny_epoch(datetime.fromtimestamp(ts[prev[-1]], NY_TZ).date(), REGULAR_CLOSE_MIN)
+            prev = prev[ts[prev] < prev_close]
+        return (close[prev[-1]] if prev.size else None), close[today]
+
+    # (전일 종가 대비 등락률 %, 당일 스파크라인) - 등락률은 전일 봉이 없으면 None
+    def summary(self, ticker, points=SPARK_POINTS):
+        prev, today = self._session(ticker)
+        change = float((today[-1] / prev - 1) * 100) if prev and today.size else None
+        if today.size > points:
+            today = today[np.linspace(0, today.size - 1, points).round().astype(int)]
+        return change, [round(float(v), 4) for v in today]
+
+
+# 뉴욕 날짜 + 분 → epoch 초
+def _ny_epoch(d, minutes=0):
+    return NY_TZ.localize(datetime(d.year, d.month, d.day, minutes // 60, minutes % 60)).timestamp()
+
+
+intraday_bars = IntradayBars()
+
+
+# -----------------------------
+# [함수] Yahoo 시세 조회 (실패 시 예외 - 대체값을 만들지 않음)
+# -----------------------------
+def _valid_price(val):
+    val = float(val)
+    return val if math.isfinite(val) and val > 0 else None
+
+# pandas / yfinance 는 무거워서 조회 함수 안에서만 import (첫 화면 로딩에서 제외, 폴러 스레드가 부담)
+@telemetry.upstream("yahoo_fx")
+def fetch_fx(timeout=FX_TIMEOUT):
+    import yfinance as yf
+    hist = yf.Ticker(FX_TICKER).history(period="1d", timeout=timeout)
+    fx = _valid_price(hist["Close"].iloc[-1])
+    if fx is None:
+        raise ValueError(f"{FX_TICKER} 시세 없음")
+    return fx
+
+# 1분봉을 마지막 봉 이후만 받아서 링버퍼에 덧붙이고, 종가는 버퍼의 마지막 값
+# (처음이거나 오래 끊긴 종목만 따로 전일 종가까지 2일치 - 새 종목 1개 때문에 전체를 다시 받지 않음)
+@telemetry.upstream("yahoo_prices")
+def fetch_prices(ticker_keys, timeout=PRICE_TIMEOUT, bars=None):
+    import pandas as pd
+    import yfinance as yf
+
+    bars = bars or intraday_bars
+    warm, cold = bars.split(ticker_keys)
+    prices = {}
+    for tickers, span in (
+        (warm, {"start": pd.Timestamp(bars.since(warm) or 0, unit="s", tz="UTC")}),
+        (cold, {"period": "2d"}),
+    ):
+        if not tickers:
+            continue
+        data = yf.download(" ".join(tickers), interval="1m", prepost=True, progress=False, timeout=timeout, **span)
+        if "Close" in data:  # 전부 빈 응답이면 열 자체가 없음
+            prices.update(parse_closes(data["Close"], tickers, bars))
+    return prices
+
+# yf.download 의 종가 표(종목이 1개면 Series) → 분봉 버퍼에 덧붙이고 종목별 마지막 가격
+def parse_closes(data, ticker_keys, bars=None):
+    import pandas as pd
+
+    bars = bars or intraday_bars
+    prices = {}
+    for t in ticker_keys:
+        try:
+            col = (data[t] if isinstance(data, pd.DataFrame) else data).dropna()
+        except (KeyError, TypeError):
+            continue
+        if col.empty:
+            continue
+        epoch = (col.index - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+        bars.extend(t, epoch, col.to_numpy())
+        val = _valid_price(bars.latest(t))
+        if val is not None:
+            prices[t] = val
+    return prices
+
+
+# ---------------------------------------------------------
+# [공급자] 시세 공급자 - fetch_fx(timeout) / fetch_prices(tickers, timeout, bars)
+# - QUOTE_PROVIDER=fake 면 네트워크 없이 도는 가짜 공급자 (부하 테스트 / 오프라인 측정용)
+# ---------------------------------------------------------
+class YahooProvider:
+    name = "yahoo"
+
+    def fetch_fx(self, timeout=FX_TIMEOUT):
+        return fetch_fx(timeout)
+
+    def fetch_prices(self, ticker_keys, timeout=PRICE_TIMEOUT, bars=None):
+        return fetch_prices(ticker_keys, timeout, bars)
+
+
+# 지연 / 실패율 / 1분봉 랜덤워크를 흉내냄 - 같은 seed 면 같은 가격 경로
+# (첫 조회 때 HISTORY_BARS 분 만큼 과거 봉을 만들고, 이후엔 지난 분 만큼만 이어서 생성)
+class FakeProvider:
+    name = "fake"
+    HISTORY_BARS = 390
+
+    def __init__(self, latency=0.2, jitter=0.1, error_rate=0.0, volatility=0.001, seed=0, fx=1400.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.volatility = volatility
+        self.seed = seed
+        self._rng = random.Random(seed)  # 지연 / 실패 결정용
+        self._walks = {}  # 종목 → (난수 생성기, 마지막 봉 epoch, 마지막 가격)
+        self._lock = threading.Lock()
+        self._fx = fx
+
+    def _call(self):
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        if failed:
+            raise ConnectionError("fake upstream error")
+
+    def _walk(self, key, start_price, now):
+        minute = int(now // 60) * 60
+        with self._lock:
+            if key not in self._walks:
+                rng = np.random.default_rng([self.seed, zlib.crc32(key.encode())])
+                self._walks[key] = (rng, minute - self.HISTORY_BARS * 60, start_price)
+            rng, last, price = self._walks[key]
+            ts = np.arange(last + 60, minute + 1, 60, dtype=np.int64)
+            close = price * np.exp(np.cumsum(rng.normal(0.0, self.volatility, ts.size)))
+            if ts.size:
+                self._walks[key] = (rng, int(ts[-1]), float(close[-1]))
+        return ts, close
+
+    @telemetry.upstream("fake_fx")
+    def fetch_fx(self, timeout=FX_TIMEOUT):
+        self._call()
+        ts, close = self._walk(FX_TICKER, self._fx, time.time())
+        return float(close[-1]) if close.size else self._walks[FX_TICKER][2]
+
+    @telemetry.upstream("fake_prices")
+    def fetch_prices(self, ticker_keys, timeout=PRICE_TIMEOUT, bars=None):
+        self._call()
+        bars = bars or intraday_bars
+        now = time.time()
+        prices = {}
+        for t in ticker_keys:
+            ts, close = self._walk(t, 10.0 + zlib.crc32(t.encode()) % 4000 / 100, now)
+            if ts.size:
+                bars.extend(t, ts, close)
+            val = _valid_price(bars.latest(t) or 0.0)
+            if val is not None:
+                prices[t] = val
+        return prices
+
+
+def make_provider(name=QUOTE_PROVIDER):
+    if name == "fake":
+        env = os.environ.get
+        return FakeProvider(
+            latency=float(env("FAKE_LATENCY", 0.2)), jitter=float(env("FAKE_JITTER", 0.1)),
+            error_rate=float(env("FAKE_ERROR_RATE", 0.0)), volatility=float(env("FAKE_VOLATILITY", 0.001)),
+            seed=int(env("FAKE_SEED", 0)),
+        )
+    if name == "yahoo":
+        return YahooProvider()
+    raise ValueError(f"알 수 없는 시세 공급자: {name}")
+
+
+quote_provider = make_provider()
+
+
+# 환율과 종목 시세를 동시에 요청하고, 각자의 마감 시간 안에 온 것만 돌려준다
+# (fx=None / prices에 없는 종목 = 이번 조회에서 못 받은 값)
+def fetch_quotes(ticker_keys, with_fx=True, fx_timeout=FX_TIMEOUT, price_timeout=PRICE_TIMEOUT, provider=None):
+    provider = provider or quote_provider
+    started = time.monotonic()
+    fx_job = _executor.submit(provider.fetch_fx, fx_timeout) if with_fx else None
+    px_job = _executor.submit(provider.fetch_prices, list(ticker_keys), price_timeout) if ticker_keys else None
+
+    def collect(job, deadline):
+        if job is None:
+            return None
+        try:
+            return job.result(timeout=max(0.0, deadline - (time.monotonic() - started)))
+        except FutureTimeout:
+            job.cancel()
+            return None
+        except Exception:
+            return None
+
+    fx = collect(fx_job, fx_timeout)
+    prices = collect(px_job, price_timeout) or {}
+    return fx, prices
+
+
+# ---------------------------------------------------------
+# [차단기] 연속 실패 시 업스트림 호출을 멈추고 지수 백오프로 복구 확인
+# ---------------------------------------------------------
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, max_timeout=600.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_timeout = max_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._timeout = reset_timeout
+        self._lock = threading.Lock()
+
+    # OPEN 상태에서 대기 시간이 지나면 1회 시험 호출(HALF_OPEN)만 허용
+    def allow(self, now=None):
+        now = now or time.time()
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and now >= self.opened_at + self._timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def retry_in(self, now=None):
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self._timeout - (now or time.time()))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._timeout = self.reset_timeout
+
+    def record_failure(self, now=None):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                self._timeout = min(self._timeout * 2, self.max_timeout)
+            elif self.failures < self.failure_threshold:
+                return
+            self.state = self.OPEN
+            self.opened_at = now or time.time()
+
+
+# ---------------------------------------------------------
+# [공유 캐시] 같은 서버의 여러 워커 프로세스가 SQLite 파일 하나를 공유
+# - 리스(lease)를 잡은 프로세스 1개만 Yahoo를 호출하고 스냅샷을 기록
+# - 나머지는 기록된 스냅샷을 읽기만 하고, 새로고침 요청은 테이블로 전달
+# ---------------------------------------------------------
+class SharedQuoteCache:
+    LEASE = "quotes"
+
+    def __init__(self, path, lease_ttl=45.0):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        # 인스턴스마다 고유 (같은 프로세스에 폴러가 둘 생겨도 둘 다 리더로 착각하지 않도록)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS quote_snapshot (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL,
+                    payload TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS quote_lease (
+                    name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS quote_requests (
+                    key TEXT PRIMARY KEY,
+                    requested_at REAL NOT NULL
+                );
+            """)
+            self._conn.commit()
+
+    # 리스가 비었거나 만료됐거나 내 것이면 (재)획득 - 결과적으로 리더인지 반환
+    def try_lead(self, now=None):
+        now = now or time.time()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO quote_lease (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at
+                WHERE quote_lease.owner = excluded.owner OR quote_lease.expires_at < ?
+            """, (self.LEASE, self.owner, now + self.lease_ttl, now))
+            row = self._conn.execute("SELECT owner FROM quote_lease WHERE name = ?", (self.LEASE,)).fetchone()
+        return row is not None and row[0] == self.owner
+
+    def publish(self, snapshot):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                INSERT INTO quote_snapshot (id, version, payload) VALUES (1, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET version=excluded.version, payload=excluded.payload
+                WHERE excluded.version > quote_snapshot.version
+            """, (snapshot.version, snapshot.to_json()))
+
+    # 내가 가진 것보다 새 버전이 있을 때만 파싱해서 돌려준다
+    def load(self, after_version=-1):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM quote_snapshot WHERE id = 1 AND version > ?", (after_version,)
+            ).fetchone()
+        return QuoteSnapshot.from_json(row[0]) if row else None
+
+    def request(self, keys):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO quote_requests (key, requested_at) VALUES (?, ?)",
+                [(k, now) for k in keys],
+            )
+
+    def take_requests(self):
+        with self._lock, self._conn:
+            keys = [k for (k,) in self._conn.execute("SELECT key FROM quote_requests")]
+            if keys:
+                self._conn.execute("DELETE FROM quote_requests")
+        return set(keys)
+
+
+# ---------------------------------------------------------
+# [폴러] 프로세스당 1개 - 백그라운드에서 스냅샷을 갱신
+# ---------------------------------------------------------
+class QuotePoller:
+    def __init__(self, ticker_keys, interval=15.0, fetch=fetch_quotes,
+                 fx_timeout=FX_TIMEOUT, price_timeout=PRICE_TIMEOUT, breaker=None, shared=None,
+                 schedule=None, bars=None):
+        self.ticker_keys = tuple(ticker_keys)
+        self.bars = bars or intraday_bars  # fetch 가 채운 분봉에서 등락률/스파크라인을 뽑음
+        self.interval = interval
+        self.schedule = schedule  # 다음 폴링까지 초를 돌려주는 함수 (없으면 interval 고정)
+        self.fx_timeout = fx_timeout
+        self.price_timeout = price_timeout
+        self._fetch = fetch
+        self.breaker = breaker or CircuitBreaker()
+        self.shared = shared
+        self.leading = shared is None
+        self._snapshot = QuoteSnapshot()
+        self._attempts = 0
+        self._cond = threading.Condition()
+        self._inflight = False
+        self._pending = set()
+        self._wake = threading.Event()
+        self._thread = None
+
+    # 리런에서는 현재 스냅샷 참조만 읽는다 (네트워크 대기 없음)
+    def snapshot(self):
+        return self._snapshot
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="quote-poller", daemon=True)
+                self._thread.start()
+        return self
+
+    # 새 주차에서 종목 목록이 바뀌면 같은 폴러가 새 목록으로 받는다 (추가된 종목은 바로 요청)
+    def set_tickers(self, ticker_keys):
+        ticker_keys = tuple(ticker_keys)
+        if ticker_keys == self.ticker_keys:
+            return
+        with self._cond:
+            added = set(ticker_keys) - set(self.ticker_keys)
+            self.ticker_keys = ticker_keys
+            self._pending |= added
+        if added:
+            self._wake.set()
+
+    # 프로세스 최초 기동 시 첫 수신만 잠깐 기다린다
+    def wait_ready(self, timeout):
+        with self._cond:
+            self._cond.wait_for(lambda: self._attempts > 0, timeout)
+        return self._snapshot
+
+    # 새로고침 버튼용: 최소 간격이 지난 종목만 골라 폴러에 맡기고 즉시 반환
+    def request_refresh(self, ticker_keys=None, min_interval=10.0):
+        snap = self._snapshot
+        if snap.degraded or self.breaker.state != CircuitBreaker.CLOSED:
+            return snap
+        now = time.time()
+        keys = [FX_TICKER] + list(ticker_keys if ticker_keys is not None else self.ticker_keys)
+        stale = {k for k in keys if snap.ticker_age(k, now) >= min_interval}
+        if stale and not self.leading:
+            self.shared.request(stale)
+        elif stale:
+            with self._cond:
+                self._pending |= stale
+            self._wake.set()
+        return snap
+
+    # 동시에 들어온 갱신 요청은 진행 중인 1건으로 합친다
+    # 차단기가 열려 있으면 업스트림을 건드리지 않고 마지막 정상값을 그대로 돌려준다
+    def refresh(self, keys=None):
+        with self._cond:
+            if self._inflight:
+                self._cond.wait_for(lambda: not self._inflight)
+                return self._snapshot
+            if not self.breaker.allow():
+                return self._snapshot
+            self._inflight = True
+
+        try:
+            keys = set(keys) if keys else {FX_TICKER, *self.ticker_keys}
+            tickers = [t for t in self.ticker_keys if t in keys]
+            try:
+                fx, prices = self._fetch(tickers, with_fx=FX_TICKER in keys,
+                                         fx_timeout=self.fx_timeout, price_timeout=self.price_timeout)
+            except Exception:
+                fx, prices = None, {}
+            now = time.time()
+            received = set(prices) | ({FX_TICKER} if fx is not None else set())
+
+            if not received:
+                self.breaker.record_failure(now)
+                with self._cond:
+                    old = self._snapshot
+                    self._snapshot = replace(old, version=old.version + 1,
+                                             stale=frozenset(old.stale | keys), degraded=True)
+                return self._snapshot
+
+            self.breaker.record_success()
+            summaries = {t: self.bars.summary(t) for t in prices}
+            with self._cond:
+                old = self._snapshot
+                stamps = dict(old.stamps)
+                stamps.update((k, now) for k in received)
+                self._snapshot = QuoteSnapshot(
+                    version=old.version + 1,
+                    fx=old.fx if fx is None else fx,
+                    prices={**old.prices, **prices},
+                    fetched_at=now if len(tickers) == len(self.ticker_keys) else old.fetched_at,
+                    stamps=stamps,
+                    stale=frozenset((old.stale | keys) - received),
+                    changes={**old.changes, **{t: c for t, (c, _) in summaries.items() if c is not None}},
+                    sparks={**old.sparks, **{t: spark for t, (_, spark) in summaries.items()}},
+                )
+        finally:
+            with self._cond:
+                self._attempts += 1
+                self._inflight = False
+                self._cond.notify_all()
+        return self._snapshot
+
+    # 장 상태에 따른 다음 폴링 간격 (휴장이면 다음 세션 시작까지)
+    def next_interval(self):
+        if self.schedule is None:
+            return self.interval
+        try:
+            delay = self.schedule()
+        except Exception:
+            return self.interval
+        return self.interval if delay is None else max(1.0, delay)
+
+    # 공유 캐시의 최신 스냅샷을 그대로 채택 (팔로워)
+    # 리더가 아직 아무것도 기록하지 않았으면 수신 전으로 보고 wait_ready 를 깨우지 않음
+    # (대기는 리더와 같은 wait_ready 타임아웃까지)
+    def _adopt_shared(self):
+        snap = self.shared.load(self._snapshot.version)
+        if snap is None or snap.version == 0:
+            return
+        with self._cond:
+            self._snapshot = snap
+            self._attempts += 1
+            self._cond.notify_all()
+
+    # 공유 캐시 사용 시 1초 단위로 깨어나 리스 갱신 + 다른 워커의 새로고침 요청 확인
+    def _sleep(self, timeout):
+        if self.shared is None:
+            return self._wake.wait(timeout)
+        end = time.monotonic() + timeout
+        renew_at = time.monotonic() + self.shared.lease_ttl / 3
+        while (left := end - time.monotonic()) > 0:
+            if self._wake.wait(min(left, 1.0)):
+                return True
+            if not self.leading:
+                continue
+            if time.monotonic() >= renew_at:
+                self.leading = self.shared.try_lead()
+                renew_at = time.monotonic() + self.shared.lease_ttl / 3
+            requested = self.shared.take_requests() if self.leading else set()
+            if requested:
+                with self._cond:
+                    self._pending |= requested
+                return True
+        return False
+
+    def _run(self):
+        keys = None
+        while True:
+            if self.shared is not None:
+                was_leading = self.leading
+                self.leading = self.shared.try_lead()
+                if self.leading and not was_leading:
+                    # 리더를 넘겨받으면 직전 리더의 마지막 정상값부터 이어간다
+                    self._adopt_shared()
+            try:
+                if self.leading:
+                    self.refresh(keys)
+                    if self.shared is not None:
+                        self.shared.publish(self._snapshot)
+                else:
+                    self._adopt_shared()
+            except Exception:
+                pass
+            # 차단기가 열려 있으면 재시도 시점까지 잠든다 (복구 확인도 이 스레드가 담당)
+            wait = max(self.next_interval(), self.breaker.retry_in()) if self.leading else FOLLOW_INTERVAL
+            woke = self._sleep(wait)
+            self._wake.clear()
+            with self._cond:
+                # 버튼 요청으로 깨어났으면 해당 종목만, 주기 도래면 전체 갱신
+                keys, self._pending = (self._pending or None) if woke else None, set()
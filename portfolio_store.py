@@ -0,0 +1,120 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from calculators import HOLDING_COLUMNS, merge_holdings
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PORTFOLIO_DB = os.environ.get("PORTFOLIO_DB", os.path.join(BASE_DIR, "portfolios.db"))
+
+POOL_SIZE = 4
+SAVE_DELAY = 2.0  # 마지막 수정 후 이 시간 동안 추가 수정이 없으면 저장
+
+
+# ---------------------------------------------------------
+# [저장소] 사용자별 보유 종목 (토큰 단위, WAL + 연결 풀)
+# - 세션 스레드들이 풀에서 연결을 빌려 쓰고 돌려준다
+# - 저장은 토큰별로 모아뒀다가 SAVE_DELAY 후 한 트랜잭션으로 기록
+# ---------------------------------------------------------
+class PortfolioStore:
+    def __init__(self, path=PORTFOLIO_DB, pool_size=POOL_SIZE, save_delay=SAVE_DELAY):
+        self.path = path
+        self.save_delay = save_delay
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(conn)
+        with self._conn() as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS portfolio_holdings (
+                    token TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    qty REAL NOT NULL,
+                    avg_cost REAL,
+                    updated REAL,
+                    PRIMARY KEY (token, ticker)
+                )
+            """)
+        self._pending = {}  # token → (holdings, 저장 예정 시각)
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="portfolio-saver", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)  # 종료 직전 대기 중인 저장분 기록
+
+    @contextmanager
+    def _conn(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # 토큰의 보유 종목 전체를 쿼리 1번으로 (저장 대기 중인 값이 있으면 그게 최신)
+    def load(self, token):
+        import pandas as pd
+        with self._cond:
+            if token in self._pending:
+                return self._pending[token][0].copy()
+        with self._conn() as conn:
+            rows = conn.execute(
+                "SELECT ticker, qty, avg_cost FROM portfolio_holdings WHERE token = ? ORDER BY rowid", (token,)
+            ).fetchall()
+        return pd.DataFrame(rows, columns=HOLDING_COLUMNS).astype({"qty": float, "avg_cost": float})
+
+    # 바로 저장하지 않고 예약만 - 연속 수정은 마지막 값 1번만 기록
+    # 같은 종목이 여러 줄이면 (종목, 토큰) 키에서 마지막 줄만 남으므로 수량 합 / 평단 가중평균으로 합쳐 둔다
+    def save_later(self, token, holdings):
+        holdings = holdings.dropna(subset=["ticker", "qty"])
+        holdings = merge_holdings(holdings[holdings["qty"] > 0])
+        with self._cond:
+            self._pending[token] = (holdings, time.monotonic() + self.save_delay)
+            self._cond.notify()
+
+    def flush(self):
+        with self._cond:
+            due, self._pending = self._pending, {}
+        self._write({t: h for t, (h, _) in due.items()})
+
+    def _write(self, batch):
+        if not batch:
+            return
+        import pandas as pd
+        now = time.time()
+        rows = [
+            (token, str(r.ticker), float(r.qty), None if pd.isna(r.avg_cost) else float(r.avg_cost), now)
+            for token, holdings in batch.items()
+            for r in holdings.dropna(subset=["ticker", "qty"]).itertuples(index=False)
+            if r.qty > 0
+        ]
+        with self._conn() as conn, conn:
+            conn.executemany("DELETE FROM portfolio_holdings WHERE token = ?", [(t,) for t in batch])
+            conn.executemany(
+                "INSERT OR REPLACE INTO portfolio_holdings (token, ticker, qty, avg_cost, updated) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                now = time.monotonic()
+                due = {t: h for t, (h, at) in self._pending.items() if at <= now}
+                if not due:
+                    self._cond.wait(min(at for _, at in self._pending.values()) - now)
+                    continue
+                for t in due:
+                    del self._pending[t]
+            try:
+                self._write(due)
+            except sqlite3.Error:
+                # 잠깐 잠겨 있었으면 다음 주기에 다시 시도
+                with self._cond:
+                    for t, h in due.items():
+                        self._pending.setdefault(t, (h, time.monotonic() + self.save_delay))
@@ -0,0 +1,94 @@
+import argparse
+import hashlib
+import os
+import re
+import tempfile
+import time
+from datetime import date, datetime
+
+from calculators import TAX_RATE
+from history_store import BASE_DIR, HistoryStore
+from market_calendar import KST, get_us_market_status, weekly_schedule
+from market_data import FX_TICKER, QUOTE_CACHE_DB, QuoteSnapshot, SharedQuoteCache
+import templates as T
+
+INDEX_HTML = os.path.join(BASE_DIR, "index.html")
+MARK_START = "<!-- prerender:start -->"
+MARK_END = "<!-- prerender:end -->"
+HASH_RE = re.compile(r"<!-- prerender:hash=(\w+) -->")
+
+
+# ---------------------------------------------------------
+# [정적 렌더] 헤더 / HOT 배너 / 종목 카드를 index.html 에 굽는다
+# - main.py 와 같은 템플릿 + 같은 값 계산(templates.info_card_values)을 사용
+# - 내용 해시가 같으면 파일을 건드리지 않고, 바뀌면 임시 파일 → os.replace 로 교체
+# ---------------------------------------------------------
+def render_snapshot(ex_date, data_map, snap, now=None):
+    schedule = weekly_schedule(date.fromisoformat(ex_date))
+    market_text, market_class = get_us_market_status(now)
+    fetched = datetime.fromtimestamp(snap.fetched_at, KST) if snap.fetched_at else None
+    header = T.HEADER_CARD.format(
+        market_class=market_class, market_text=market_text, week_label=schedule['week_label'],
+        usd_krw=snap.fx, fx_flag=" ⚠️" if snap.is_stale(FX_TICKER) else "",
+        update_time=snap.update_time, age=f"{fetched.month}/{fetched.day}" if fetched else "수신 대기",
+        buy_limit=schedule['buy_limit'], ex_date=schedule['ex_date'], pay_date=schedule['pay_date'],
+    )
+    best_ticker = max(data_map, key=lambda k: data_map[k]['rate'])
+    banner = T.HOT_BANNER.format(best_ticker=best_ticker, best_rate=data_map[best_ticker]['rate'])
+    cards = "".join(
+        T.INFO_CARD.format(**T.info_card_values(t, data_map[t], snap, TAX_RATE)) for t in sorted(data_map)
+    )
+    return f'<style>{T.CARD_STYLESHEET}</style>{header}{banner}<div class="snapshot-grid">{cards}</div>'
+
+def splice(page, body):
+    start, end = page.index(MARK_START) + len(MARK_START), page.index(MARK_END)
+    return page[:start] + "\n" + body + "\n" + page[end:]
+
+def write_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".prerender-", suffix=".html")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+# 바뀌었으면 True
+def prerender(path=INDEX_HTML, store=None, shared=None, now=None):
+    store = store or HistoryStore()
+    ex_date, data_map = store.load_week()
+    if not data_map:
+        return False
+    snap = (shared or SharedQuoteCache(QUOTE_CACHE_DB)).load() or QuoteSnapshot()
+    body = render_snapshot(ex_date, data_map, snap, now)
+    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+
+    with open(path, encoding="utf-8") as f:
+        page = f.read()
+    current = HASH_RE.search(page)
+    if current and current.group(1) == digest:
+        return False
+    write_atomic(path, splice(page, f"<!-- prerender:hash={digest} -->\n{body}"))
+    return True
+
+
+# python prerender.py [--watch 15]  (주기적으로 돌리면 바뀐 때만 다시 씀)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="index.html 정적 스냅샷 생성")
+    parser.add_argument("--output", default=INDEX_HTML)
+    parser.add_argument("--watch", type=float, default=0, help="초 단위 반복 주기 (0 이면 1번만)")
+    args = parser.parse_args()
+
+    store = HistoryStore()
+    store.import_week_file()
+    shared = SharedQuoteCache(QUOTE_CACHE_DB)
+    while True:
+        if prerender(args.output, store, shared):
+            print(f"{datetime.now(KST):%H:%M:%S} {args.output} 갱신")
+        if not args.watch:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,286 @@
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+import telemetry
+
+WEEKS_PER_YEAR = 52
+
+
+# ---------------------------------------------------------
+# [스노우볼] 배당 재투자 시뮬레이션 (종목 축으로 벡터화)
+# - 입력은 모두 원화 기준: 주가(원), 세후 주당 배당금(원)
+# - whole_shares=True 면 1주 단위로만 사고 남는 돈은 다음 주로 이월
+# - 반환: (weeks+1, 종목수) 배열 3개 - 평가금(원), 보유 수량, 남는 돈(원)
+# ---------------------------------------------------------
+def simulate_snowball(shares, price_krw, div_krw_net, weeks, whole_shares=True):
+    price = np.atleast_1d(np.asarray(price_krw, dtype=float))
+    div = np.broadcast_to(np.asarray(div_krw_net, dtype=float), price.shape)
+    sh = np.broadcast_to(np.asarray(shares, dtype=float), price.shape).copy()
+    cash = np.zeros_like(price)
+    tradable = price > 0
+    safe_price = np.where(tradable, price, 1.0)
+
+    shares_path = np.empty((weeks + 1, price.size))
+    cash_path = np.zeros((weeks + 1, price.size))
+    shares_path[0] = sh
+
+    if whole_shares:
+        for w in range(1, weeks + 1):
+            pay = sh * div + cash
+            buy = np.where(tradable, np.floor(pay / safe_price), 0.0)
+            sh = sh + buy
+            cash = pay - buy * price
+            shares_path[w] = sh
+            cash_path[w] = cash
+    else:
+        # 소수점 재투자는 닫힌 식: 매주 (1 + 배당/주가) 배로 늘어남
+        growth = np.where(tradable, 1.0 + div / safe_price, 1.0)
+        shares_path[:] = sh * np.power(growth, np.arange(weeks + 1)[:, None])
+        cash_path[1:] = np.where(tradable, 0.0, np.arange(1, weeks + 1)[:, None] * sh * div)
+
+    value_path = shares_path * price + cash_path
+    return value_path, shares_path, cash_path
+
+
+# ---------------------------------------------------------
+# [캐시] (종목, 수량, 주가, 배당금, 환율, 기간, 방식) 단위 메모이제이션
+# - 없는 종목만 모아서 한 번의 배치 계산으로 채운다
+# ---------------------------------------------------------
+class SnowballCache:
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def batch(self, rows, shares, fx, weeks, tax_rate, whole_shares=True):
+        keys = [(t, shares, price, div, fx, weeks, tax_rate, whole_shares) for t, price, div in rows]
+        with self._lock:
+            hits = {k: self._items[k] for k in keys if k in self._items}
+            for k in hits:
+                self._items.move_to_end(k)
+        missing = [k for k in keys if k not in hits]
+        telemetry.cache("snowball", len(keys), len(missing))
+        if missing:
+            price_krw = np.array([k[2] for k in missing]) * fx
+            div_net = np.array([k[3] for k in missing]) * fx * (1 - tax_rate)
+            values, sh, cash = simulate_snowball(shares, price_krw, div_net, weeks, whole_shares)
+            with self._lock:
+                for i, k in enumerate(missing):
+                    hits[k] = self._items[k] = (values[:, i], sh[:, i], cash[:, i])
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+        return {k[0]: hits[k] for k in keys}
+
+
+snowball_cache = SnowballCache()
+
+
+# ---------------------------------------------------------
+# [스트레스] 배당 삭감 몬테카를로 (과거 배당 변화율 부트스트랩)
+# - 주당 배당금의 회차별 로그 변화율을 (추세 포함) 그대로 복원 추출해서 경로 생성
+# - 주가는 분배율이 유지된다고 보고 배당금과 같은 비율로 움직임
+# - 수량 / 환율 / 세율은 밴드에 곱하기만 하면 되므로 캐시 키에서 제외
+# ---------------------------------------------------------
+STRESS_PATHS = 2000
+STRESS_SEED = 42
+STRESS_PERCENTILES = (5, 25, 50, 75, 95)
+MIN_HISTORY = 8  # 변화율이 이보다 적으면 분포로 보기 어려워 고정 시나리오 사용
+
+# [(배당락일 epoch ms, 배당금), ...] → 주 단위 로그 변화율 (0 이하 배당은 제외)
+# 월배당 시절 이력은 회차 간격(주)으로 나눠서 주간 변화율로 맞춤
+def dividend_log_changes(points):
+    pts = np.array([p for p in sorted(points) if p[1] > 0], dtype=float).reshape(-1, 2)
+    if len(pts) < 2:
+        return ()
+    gap_weeks = np.maximum(np.round(np.diff(pts[:, 0]) / (7 * 86400 * 1000)), 1)
+    return tuple(np.round(np.diff(np.log(pts[:, 1])) / gap_weeks, 6))
+
+@lru_cache(maxsize=256)
+def _stress_bands(div, price, changes, weeks, n_paths, seed):
+    rng = np.random.default_rng(seed)
+    # 관측된 변화율을 그대로 복원 추출 (NAV 가 줄어드는 종목은 그 추세가 곧 핵심 위험)
+    steps = rng.choice(np.asarray(changes), size=(n_paths, weeks))
+    growth = np.exp(np.cumsum(steps, axis=1))
+    income = np.percentile(div * growth, STRESS_PERCENTILES, axis=0)
+    capital = np.percentile(price * growth[:, -1], STRESS_PERCENTILES)
+    cum_income = np.percentile((div * growth).sum(axis=1), STRESS_PERCENTILES)
+    for arr in (income, capital, cum_income):
+        arr.flags.writeable = False  # 캐시 공유 배열이라 읽기 전용
+    return income, capital, cum_income
+
+# 반환: (주차별 주당 배당 밴드 (분위수, weeks), N주 후 주가 분위수, N주 누적 주당 배당 분위수)
+def stress_bands(div, price, changes, weeks, n_paths=STRESS_PATHS, seed=STRESS_SEED):
+    if len(changes) < MIN_HISTORY or div <= 0 or weeks < 1:
+        return None
+    return _stress_bands(float(div), float(price), tuple(changes), int(weeks), n_paths, seed)
+
+
+# ---------------------------------------------------------
+# [백테스트] 상장 첫 주 종가에 원금 1 투자 가정 (ROC 로 인한 NAV 감소 반영)
+# - 종목 축 벡터 상태를 들고 있다가 새 주가 끝나면 한 행만 append
+# - 최근 REWIND_WEEKS 주는 확정하지 않고 매번 다시 계산 (늦게 들어온 종가 / 배당 반영)
+# - 재투자 X: 배당은 현금으로 쌓임 / 재투자 O: 배당락 주 종가로 소수점 재투자
+# ---------------------------------------------------------
+REWIND_WEEKS = 2
+STATE_FIELDS = (
+    "weeks", "entry", "price", "hold_shares", "hold_cash", "reinv_shares",
+    "peak_hold", "peak_reinv", "mdd_hold", "mdd_reinv", "free_ride_week", "log_drift",
+)
+
+class Backtest:
+    def __init__(self, tickers):
+        self._lock = threading.Lock()
+        self._reset(tickers)
+
+    # 종목 목록이 바뀌면 (새 주차에 종목 추가 / 제외) 상태를 비우고 다음 update 에서 처음부터 다시 채움
+    def set_tickers(self, tickers):
+        with self._lock:
+            if tuple(tickers) != self.tickers:
+                self._reset(tickers)
+
+    def _reset(self, tickers):
+        self.tickers = tuple(tickers)
+        n = len(self.tickers)
+        self.last_week = None            # 마지막으로 반영한 주 (금요일 Timestamp)
+        self.weeks = np.zeros(n, dtype=int)
+        self.entry = np.full(n, np.nan)  # 첫 주 종가
+        self.price = np.full(n, np.nan)  # 최근 주 종가
+        self.hold_shares = np.zeros(n)
+        self.hold_cash = np.zeros(n)
+        self.reinv_shares = np.zeros(n)
+        self.peak_hold = np.zeros(n)
+        self.peak_reinv = np.zeros(n)
+        self.mdd_hold = np.zeros(n)
+        self.mdd_reinv = np.zeros(n)
+        self.free_ride_week = np.full(n, -1)  # 누적 배당이 원금을 넘은 주차 (-1: 아직)
+        self.log_drift = np.zeros(n)          # 주간 종가 로그 변화 합계
+        self._base = (None, self._state())    # (확정한 마지막 주, 그 시점 상태) - 여기서부터 다시 계산
+
+    def _state(self):
+        return {f: getattr(self, f).copy() for f in STATE_FIELDS}
+
+    def _restore(self, state):
+        for f, arr in state.items():
+            setattr(self, f, arr.copy())
+
+    def values(self):
+        hold = np.nan_to_num(self.hold_shares * self.price) + self.hold_cash
+        reinv = np.nan_to_num(self.reinv_shares * self.price)
+        return hold, reinv
+
+    # prices: 주간 종가 (상장 전 / 거래 없음은 NaN), divs: 그 주 배당락 주당 배당금
+    def append(self, prices, divs):
+        p = np.asarray(prices, dtype=float)
+        dv = np.nan_to_num(np.asarray(divs, dtype=float))
+        live = np.isfinite(p) & (p > 0)
+        started = live & np.isfinite(self.entry)
+        new = live & ~started
+        safe_p = np.where(live, p, 1.0)
+        prev_p = np.where(started, self.price, 1.0)
+
+        self.hold_cash += np.where(started, self.hold_shares * dv, 0.0)
+        self.reinv_shares += np.where(started, self.reinv_shares * dv / safe_p, 0.0)
+        self.log_drift += np.where(started, np.log(safe_p / prev_p), 0.0)
+        self.weeks += started
+
+        self.entry = np.where(new, p, self.entry)
+        self.hold_shares = np.where(new, 1.0 / safe_p, self.hold_shares)
+        self.reinv_shares = np.where(new, 1.0 / safe_p, self.reinv_shares)
+        self.price = np.where(live, p, self.price)
+
+        hold, reinv = self.values()
+        self.peak_hold = np.fmax(self.peak_hold, hold)
+        self.peak_reinv = np.fmax(self.peak_reinv, reinv)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.mdd_hold = np.fmax(self.mdd_hold, np.where(self.peak_hold > 0, 1 - hold / self.peak_hold, 0.0))
+            self.mdd_reinv = np.fmax(self.mdd_reinv, np.where(self.peak_reinv > 0, 1 - reinv / self.peak_reinv, 0.0))
+        reached = started & (self.free_ride_week < 0) & (self.hold_cash >= 1.0)
+        self.free_ride_week = np.where(reached, self.weeks, self.free_ride_week)
+
+    # 저장소에서 이 날짜 이후 종가만 읽으면 됨 (확정한 주 이후 = 최근 REWIND_WEEKS 주 + 새 주)
+    @property
+    def since(self):
+        base_week = self._base[0]
+        return base_week.strftime("%Y-%m-%d") if base_week is not None else None
+
+    # 완료된 주만, 확정한 주 이후부터 다시 append - 마지막 REWIND_WEEKS 주를 뺀 지점까지 새로 확정
+    def update(self, daily_prices, dividends, today=None):
+        with self._lock:
+            base_week, base_state = self._base
+            rows = weekly_rows(self.tickers, daily_prices, dividends, after=base_week, today=today)
+            if not rows:
+                return 0
+            self._restore(base_state)
+            self.last_week = base_week
+            settled = len(rows) - REWIND_WEEKS
+            for i, (week, prices, divs) in enumerate(rows, 1):
+                self.append(prices, divs)
+                self.last_week = week
+                if i == settled:
+                    self._base = (week, self._state())
+            return len(rows)
+
+    def summary(self, ticker):
+        with self._lock:
+            if ticker not in self.tickers:
+                return None
+            i = self.tickers.index(ticker)
+            if self.weeks[i] == 0:
+                return None
+            hold, reinv = self.values()
+            return {
+                "weeks": int(self.weeks[i]),
+                "nav_change": self.price[i] / self.entry[i] - 1,
+                "recovered": self.hold_cash[i],
+                "ret_hold": hold[i] - 1,
+                "ret_reinv": reinv[i] - 1,
+                "mdd_hold": self.mdd_hold[i],
+                "mdd_reinv": self.mdd_reinv[i],
+                "free_ride_week": int(self.free_ride_week[i]),
+                "weekly_drift": self.log_drift[i] / self.weeks[i],
+            }
+
+
+# 일별 종가 / 배당 이력 → [(주 마지막 금요일, 종가 벡터, 배당 벡터), ...]
+# today 가 속한 주는 아직 끝나지 않았으므로 제외
+def weekly_rows(tickers, daily_prices, dividends, after=None, today=None):
+    import pandas as pd
+
+    # 종가가 하나도 없는 종목(신규 상장 / 아직 동기화 전)도 빈 DatetimeIndex 로 만들어야 resample 이 된다
+    def series(points, key):
+        points = list(points)
+        index = pd.DatetimeIndex([key(k) for k, _ in points])
+        return pd.Series([v for _, v in points], index=index, dtype=float)
+
+    closes = pd.DataFrame({t: series(daily_prices.get(t, []), pd.Timestamp) for t in tickers})
+    if closes.empty:
+        return []
+    weekly = closes.resample("W-FRI").last()
+    after_ms = after.timestamp() * 1000 if after is not None else float("-inf")
+    divs = pd.DataFrame({
+        t: series(((ms, v) for ms, v in dividends.get(t, []) if ms > after_ms),
+                  lambda ms: pd.Timestamp(ms, unit="ms").normalize())
+        for t in tickers
+    })
+    if not divs.empty:
+        weekly_divs = divs.resample("W-FRI").sum().reindex(weekly.index).fillna(0.0)
+    else:
+        weekly_divs = pd.DataFrame(0.0, index=weekly.index, columns=weekly.columns)
+    week_end = pd.Timestamp(today or pd.Timestamp.now().normalize())
+    keep = weekly.index < week_end
+    if after is not None:
+        keep &= weekly.index > after
+    weekly, weekly_divs = weekly[keep], weekly_divs[keep]
+    return list(zip(weekly.index, weekly.to_numpy(), weekly_divs.to_numpy()))
+
+
+# 배당이 NAV 와 같은 비율로 줄어든다고 보고 누적 배당 ≥ 원금이 되는 주차 (없으면 None)
+def breakeven_weeks(cost, div, weekly_drift, max_weeks=10 * WEEKS_PER_YEAR):
+    if div <= 0:
+        return None
+    paid = div * np.cumsum(np.exp(weekly_drift * np.arange(1, max_weeks + 1)))
+    hit = np.flatnonzero(paid >= cost)
+    return int(hit[0]) + 1 if hit.size else None
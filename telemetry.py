@@ -0,0 +1,255 @@
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))  # 0 이면 엔드포인트를 띄우지 않음
+PROFILE_HZ = float(os.environ.get("PROFILE_HZ", 0))    # 0 이면 샘플링 프로파일러 끔
+
+PREFIX = "roundhill_"
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SESSIONS = 200  # 세션별 리런 수는 최근 세션만 내보냄 (라벨 개수 제한)
+
+
+# ---------------------------------------------------------
+# [계측] 카운터 / 히스토그램 - 프로세스당 1개, 표준 라이브러리만 사용
+# - 핫패스에서는 락 1번 + dict 갱신만 하고, 텍스트 변환은 /metrics 요청 때만
+# ---------------------------------------------------------
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._counters = Counter()  # (이름, 라벨) → 값
+        self._hists = {}            # (이름, 라벨) → [버킷별 개수..., 합계, 개수]
+        self._sessions = {}         # 세션 id → 리런 수 (삽입 순서 = 최근 순)
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                h = self._hists[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    h[i] += 1
+                    break
+            h[-2] += seconds
+            h[-1] += 1
+
+    def rerun(self, session_id):
+        with self._lock:
+            self._counters[("reruns_total", ())] += 1
+            count = self._sessions.pop(session_id, 0) + 1
+            self._sessions[session_id] = count
+            if len(self._sessions) > MAX_SESSIONS:
+                del self._sessions[next(iter(self._sessions))]
+
+    # {라벨: 값} (히스토그램은 관측 수) - 부하 테스트 리포트용
+    def totals(self, name):
+        with self._lock:
+            out = {labels: v for (n, labels), v in self._counters.items() if n == name}
+            out.update((labels, h[-1]) for (n, labels), h in self._hists.items() if n == name)
+        return out
+
+    # Prometheus text exposition format 0.0.4
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            hists = sorted((k, list(v)) for k, v in self._hists.items())
+            sessions = list(self._sessions.items())
+
+        lines, seen = [], set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {PREFIX}{name} {self._help[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value:g}")
+        for (name, labels), h in hists:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(self.buckets, h):
+                cumulative += n
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {h[-1]}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {h[-2]:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_labels(labels)} {h[-1]}")
+        if sessions:
+            header("session_reruns", "gauge")
+            for session_id, count in sessions:
+                lines.append(f"{PREFIX}session_reruns{_labels((('session', session_id),))} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+metrics.describe("span_seconds", "main.py 단계별 소요 시간")
+metrics.describe("cache_lookups_total", "캐시 조회 수")
+metrics.describe("cache_misses_total", "캐시 미스 수 (적중률 = 1 - misses / lookups)")
+metrics.describe("upstream_seconds", "업스트림(Yahoo) 호출 소요 시간")
+metrics.describe("upstream_errors_total", "업스트림 호출 실패 수")
+metrics.describe("reruns_total", "전체 스크립트 리런 수")
+metrics.describe("session_reruns", "세션별 전체 리런 수 (최근 세션만)")
+
+
+# with span("market_info"): ... → roundhill_span_seconds{stage="market_info"}
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("span_seconds", time.perf_counter() - started, stage=stage)
+
+# st.cache_data 처럼 적중 여부를 밖에서 모르는 캐시는 밖에서 조회만, 함수 본문에서 미스만 센다
+def cache(name, lookups=1, misses=0):
+    if lookups:
+        metrics.inc("cache_lookups_total", lookups, cache=name)
+    if misses:
+        metrics.inc("cache_misses_total", misses, cache=name)
+
+# 업스트림 호출 함수에 붙이는 데코레이터 (예외는 그대로 다시 던짐)
+def upstream(call):
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                metrics.inc("upstream_errors_total", call=call, error=type(e).__name__)
+                raise
+            finally:
+                metrics.observe("upstream_seconds", time.perf_counter() - started, call=call)
+        return inner
+    return wrap
+
+
+# ---------------------------------------------------------
+# [프로파일러] 운영 중 켜 두는 샘플링 프로파일러 (PROFILE_HZ)
+# - 주기마다 모든 스레드의 스택을 찍어서 "모듈:함수;..." 단위로 개수만 센다
+# - /debug/profile 이 collapsed stack 형식으로 내보냄 (flamegraph.pl / speedscope 호환)
+# ---------------------------------------------------------
+class SamplingProfiler:
+    def __init__(self, hz=PROFILE_HZ, max_depth=64):
+        self.interval = 1.0 / hz
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                parts = []
+                while frame is not None and len(parts) < self.max_depth:
+                    code = frame.f_code
+                    parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stacks.append(";".join([names.get(ident, str(ident)), *reversed(parts)]))
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def collapsed(self, top=0):
+        with self._lock:
+            items = self._stacks.most_common(top or None)
+        return "".join(f"{stack} {n}\n" for stack, n in items)
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+
+# ---------------------------------------------------------
+# [엔드포인트] /metrics (Prometheus) + /debug/profile (프로파일러 켰을 때만)
+# - 기본은 127.0.0.1 에만 열어서 외부로 노출하지 않음
+# ---------------------------------------------------------
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = metrics
+    profiler = None  # serve_metrics() 에서 주입
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            return self._send(200, self.registry.render(), "text/plain; version=0.0.4; charset=utf-8")
+        if url.path == "/debug/profile" and self.profiler is not None:
+            query = parse_qs(url.query)
+            body = self.profiler.collapsed(int(query.get("top", [0])[0] or 0))
+            if "reset" in query:
+                self.profiler.reset()
+            return self._send(200, body, "text/plain; charset=utf-8")
+        return self._send(404, "not found\n", "text/plain; charset=utf-8")
+
+    def _send(self, status, text, content_type):
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        pass  # 스크레이프마다 로그가 쌓이지 않도록
+
+
+def serve_metrics(host=METRICS_HOST, port=METRICS_PORT, profiler=None):
+    MetricsHandler.profiler = profiler
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+# 환경변수에 따라 엔드포인트 / 프로파일러를 켠다 (둘 다 꺼져 있으면 아무것도 안 함)
+def start_from_env():
+    profiler = SamplingProfiler(PROFILE_HZ).start() if PROFILE_HZ > 0 else None
+    server = None
+    if METRICS_PORT:
+        try:
+            server = serve_metrics(METRICS_HOST, METRICS_PORT, profiler)
+        except OSError as e:
+            print(f"metrics endpoint {METRICS_HOST}:{METRICS_PORT} 열기 실패: {e}", file=sys.stderr)
+    return server, profiler
@@ -0,0 +1,673 @@
+import re
+
+# ---------------------------------------------------------
+# [템플릿] HTML 카드 / 스타일시트
+# - import 시 1번만 공백을 정리(compile)하고, 렌더링 때는 값만 채운다 (str.format)
+# ---------------------------------------------------------
+def compile_template(raw):
+    return " ".join(line.strip() for line in raw.splitlines() if line.strip())
+
+def compile_stylesheet(raw):
+    return compile_template(re.sub(r"/\*.*?\*/", "", raw, flags=re.S))
+
+# -----------------------------
+# [스타일] CSS (Roundhill Theme: Deep Teal & Mint)
+# -----------------------------
+_CSS_FONT = """
+    @import url('https://cdn.jsdelivr.net/gh/orioncactus/pretendard/dist/web/static/pretendard.css');
+"""
+
+# Streamlit 페이지 전체에 거는 규칙 (정적 페이지에는 넣지 않음)
+_CSS_GLOBAL = """
+    /* 1. 글로벌 스타일 */
+    html, body, [class*="css"] {
+        font-family: 'Pretendard', sans-serif;
+        background-color: #f0fdfa !important; /* 아주 연한 민트 배경 */
+        color: #191f28 !important;
+    }
+
+    /* Streamlit 기본 패딩 조정 */
+    .block-container {
+        padding-top: 2rem !important;
+        padding-bottom: 3rem !important;
+        padding-left: 1rem !important;
+        padding-right: 1rem !important;
+    }
+"""
+
+_CSS_CARDS = """
+    /* 2. 헤더 카드 (Deep Teal Gradient) */
+    .header-card {
+        background: linear-gradient(135deg, #0f766e 0%, #14b8a6 100%);
+        padding: 28px 20px;
+        border-radius: 24px;
+        color: white !important;
+        margin-bottom: 20px;
+        box-shadow: 0 10px 25px rgba(15, 118, 110, 0.3);
+        position: relative;
+        overflow: hidden;
+    }
+    .header-card h2, .header-card div, .header-card span {
+        color: white !important;
+    }
+    .header-card::before {
+        content: ''; position: absolute; top: -60px; right: -60px;
+        width: 180px; height: 180px;
+        background: rgba(255,255,255,0.1); border-radius: 50%; z-index: 0;
+    }
+
+    /* 3. 뱃지 스타일 */
+    .market-badge {
+        display: inline-flex; align-items: center; gap: 6px;
+        padding: 6px 12px; border-radius: 20px;
+        font-size: 0.8rem; font-weight: 700;
+        margin-bottom: 12px;
+        box-shadow: 0 4px 10px rgba(0,0,0,0.15);
+    }
+    .header-card .status-open { background: #00e676 !important; color: #003300 !important; animation: pulse 2s infinite; }
+    .header-card .status-pre { background: #ffea00 !important; color: #3e2723 !important; }
+    .header-card .status-after { background: #d1c4e9 !important; color: #4527a0 !important; }
+    .header-card .status-day { background: #00b0ff !important; color: #00251a !important; }
+    .header-card .status-closed { background: #eceff1 !important; color: #455a64 !important; border: 1px solid #cfd8dc; }
+
+    @keyframes pulse {
+        0% { box-shadow: 0 0 0 0 rgba(0, 230, 118, 0.7); }
+        70% { box-shadow: 0 0 0 10px rgba(0, 230, 118, 0); }
+        100% { box-shadow: 0 0 0 0 rgba(0, 230, 118, 0); }
+    }
+
+    .fx-badge {
+        background: rgba(255,255,255,0.2); padding: 6px 12px; border-radius: 12px;
+        font-size: 0.8rem; font-weight: 600; backdrop-filter: blur(5px);
+        border: 1px solid rgba(255,255,255,0.2); color: white !important;
+    }
+
+    /* 4. 타임라인 & 핫픽 배너 */
+    .timeline-container { display: flex; gap: 8px; margin-top: 20px; }
+    .glass-box {
+        flex: 1; text-align: center; background: rgba(255,255,255,0.1);
+        padding: 10px; border-radius: 16px; border: 1px solid rgba(255,255,255,0.15);
+        backdrop-filter: blur(4px);
+    }
+    .t-label { font-size: 0.7rem; color: rgba(255,255,255,0.8) !important; margin-bottom: 4px; }
+    .t-val { font-size: 0.9rem; font-weight: 700; color: #fff !important; white-space: nowrap; }
+    .accent-gold { color: #ffd700 !important; }
+
+    /* 🔥 1등 배너 스타일 */
+    .hot-banner {
+        background: #fff; border-radius: 16px; padding: 12px 16px;
+        margin-bottom: 16px; display: flex; align-items: center; justify-content: space-between;
+        box-shadow: 0 4px 12px rgba(15, 118, 110, 0.15); border: 1px solid #ccfbf1;
+    }
+    .hot-badge { background: #ef4444; color: white; padding: 4px 8px; border-radius: 8px; font-size: 0.75rem; font-weight: 800; margin-right: 8px; }
+    .hot-text { font-size: 0.95rem; font-weight: 700; color: #374151; }
+    .hot-val { color: #0f766e; font-weight: 800; }
+
+    /* 5. 메인 정보 카드 */
+    .info-card {
+        background: white !important; border-radius: 24px; padding: 24px;
+        box-shadow: 0 8px 24px rgba(0,0,0,0.03); border: 1px solid #ccfbf1; margin-bottom: 20px;
+    }
+    .metric-grid { display: flex; gap: 8px; margin-top: 20px; }
+    .metric-box {
+        flex: 1; background: #f0fdfa !important; border-radius: 14px;
+        padding: 12px 6px; text-align: center; border: 1px solid #99f6e4; min-width: 0;
+    }
+    .m-title { font-size: 0.7rem; color: #0f766e !important; font-weight: 600; margin-bottom: 4px; white-space: nowrap; }
+    .m-data { font-size: 0.95rem; font-weight: 800; color: #115e59 !important; }
+
+    /* 6. 계산기 카드 */
+    .calc-card-bg { background: white !important; border-radius: 24px; padding: 20px; border: 1px solid #e0e0e0; margin-top: 10px; }
+    .calc-row { display: flex; justify-content: space-between; margin-bottom: 10px; align-items: center; }
+    .calc-label { font-size: 0.9rem; color: #666 !important; }
+    .calc-val { font-weight: 700; color: #333 !important; }
+    .calc-divider { border-top: 1px dashed #ddd; margin: 12px 0; }
+    .calc-total-label { font-size: 1rem; font-weight: 700; color: #0d9488 !important; }
+    .calc-total-val { font-size: 1.4rem; font-weight: 800; color: #0f766e !important; }
+
+    /* 주의사항 박스 */
+    .caution-box {
+        margin-top: 16px; padding: 14px; background: #fafafa !important; 
+        border-radius: 12px; border: 1px solid #eee;
+        font-size: 0.8rem; color: #767676 !important; line-height: 1.5;
+    }
+    .caution-header { font-weight: 700; color: #555 !important; margin-bottom: 4px; display: block; }
+
+    /* 뱃지류 */
+    .badge-roc { background: #fff0f2 !important; color: #f04452 !important; padding: 4px 8px; border-radius: 6px; font-size: 0.75rem; font-weight: 700; }
+    .badge-safe { background: #e8fdf3 !important; color: #02cba5 !important; padding: 4px 8px; border-radius: 6px; font-size: 0.75rem; font-weight: 700; }
+    .ticker-tag { background: #ccfbf1 !important; color: #0f766e !important; padding: 4px 10px; border-radius: 8px; font-weight: 800; font-size: 0.9rem; }
+"""
+
+_CSS_WIDGETS = """
+    /* 위젯 커스텀 */
+    div.stButton > button {
+        width: 100%; border-radius: 12px; font-weight: 700;
+        background: #fff !important; border: 1px solid #e5e8eb !important;
+        color: #6b7684 !important; height: 48px; transition: all 0.2s;
+    }
+    div.stButton > button:hover { background: #f0fdfa !important; color: #0f766e !important; border-color: #99f6e4 !important; }
+
+    /* ------------------------------------------------------------- */
+    /* [완벽 수정] 탭 메뉴(Radio) 가로 스크롤 & 활성 색상 강제 적용 */
+    /* ------------------------------------------------------------- */
+
+    /* 1. 컨테이너: 무조건 한 줄(nowrap), 가로 스크롤 허용 */
+    div[data-testid="stRadio"] > div[role="radiogroup"] {
+        display: flex !important;
+        flex-direction: row !important;
+        flex-wrap: nowrap !important; /* 줄바꿈 절대 금지 */
+        overflow-x: auto !important;  /* 가로 스크롤 허용 */
+        white-space: nowrap !important;
+        gap: 8px !important;
+        padding-bottom: 8px !important;
+        -webkit-overflow-scrolling: touch !important; /* 아이폰 부드러운 스크롤 */
+    }
+
+    /* 2. 스크롤바 스타일링 (PC에서도 인지 가능하도록 얇게 표시) */
+    div[role="radiogroup"]::-webkit-scrollbar {
+        height: 3px;
+    }
+    div[role="radiogroup"]::-webkit-scrollbar-thumb {
+        background: #ccc;
+        border-radius: 10px;
+    }
+
+    /* 3. 버튼(Label) 기본 스타일 */
+    div[data-testid="stRadio"] label {
+        background-color: #ffffff !important;
+        border: 1px solid #e5e8eb !important;
+        border-radius: 24px !important;
+        padding: 10px 20px !important;
+        margin-right: 0 !important;
+        font-size: 0.9rem !important;
+        font-weight: 700 !important;
+        color: #6b7684 !important;
+        cursor: pointer !important;
+        transition: all 0.2s ease-in-out !important;
+
+        /* 찌그러짐 방지 핵심 속성 */
+        flex: 0 0 auto !important; 
+        min-width: max-content !important;
+
+        box-shadow: 0 2px 5px rgba(0,0,0,0.03) !important;
+    }
+
+    /* 4. 라디오 기본 원형 숨기기 */
+    div[data-testid="stRadio"] label > div:first-child {
+        display: none !important;
+    }
+
+    /* 5. [Active State] 선택된 버튼 스타일 (배경색 변경) */
+    div[data-testid="stRadio"] label:has(input:checked) {
+        background-color: #0f766e !important; /* Theme Color */
+        border-color: #0f766e !important;
+        box-shadow: 0 4px 12px rgba(15, 118, 110, 0.4) !important;
+        transform: translateY(-1px);
+    }
+
+    /* 6. [Active Text] 선택된 버튼 글자색 (하위 모든 요소 강제 흰색) */
+    div[data-testid="stRadio"] label:has(input:checked) * {
+        color: #ffffff !important;
+    }
+
+    /* 7. 호버 효과 */
+    div[data-testid="stRadio"] label:hover {
+        border-color: #0f766e !important;
+        color: #0f766e !important;
+    }
+    /* 선택된 상태에서는 호버해도 흰색 유지 */
+    div[data-testid="stRadio"] label:has(input:checked):hover * {
+        color: #ffffff !important; 
+    }
+"""
+
+_CSS_MOBILE = """
+    /* 모바일 반응형 */
+    @media (max-width: 480px) {
+        .header-card { padding: 24px 16px; }
+        .header-card h2 { font-size: 1.3rem !important; }
+        .hot-text { font-size: 0.85rem; }
+        .info-card { padding: 20px 16px; }
+        div[data-testid="stRadio"] label { padding: 8px 16px !important; font-size: 0.85rem !important; }
+    }
+"""
+
+STYLESHEET = compile_stylesheet(_CSS_FONT + _CSS_GLOBAL + _CSS_CARDS + _CSS_WIDGETS + _CSS_MOBILE)
+
+# prerender.py 가 굽는 정적 카드용 (페이지 배경/폰트 색은 건드리지 않음)
+CARD_STYLESHEET = compile_stylesheet(_CSS_FONT + _CSS_CARDS + _CSS_MOBILE)
+
+# 리런마다 st.html 로 보내는 스타일 태그 (<style> 만 있으면 iframe / 빈 공간 없이 주입됨)
+STYLE_TAG = f"<style>{STYLESHEET}</style>"
+
+# -----------------------------
+# [헤더] 장 상태 / 환율 / 배당 일정
+# -----------------------------
+HEADER_CARD = compile_template("""
+    <div class="header-card">
+        <div class="header-content" style="display:flex; justify-content:space-between; align-items:start;">
+            <div>
+                <div class="market-badge {market_class}">{market_text}</div>
+                <h2 style="margin:0; font-size:1.5rem; font-weight:800; letter-spacing:-0.5px;">
+                    Roundhill WeeklyPay™<br>{week_label} 배당
+                </h2>
+            </div>
+            <div style="text-align:right;">
+                <div class="fx-badge">🇺🇸 1$ = {usd_krw:,.0f}원{fx_flag}</div>
+                <div style="font-size:0.7rem; margin-top:4px; opacity:0.8;">{update_time} 기준 · {age}</div>
+            </div>
+        </div>
+        <div class="header-content timeline-container">
+            <div class="glass-box">
+                <div class="t-label">🚨 매수마감</div>
+                <div class="t-val accent-gold">{buy_limit}</div>
+            </div>
+            <div class="glass-box">
+                <div class="t-label">📉 배당락일</div>
+                <div class="t-val">{ex_date}</div>
+            </div>
+            <div class="glass-box">
+                <div class="t-label">💰 지급일</div>
+                <div class="t-val accent-green">{pay_date}</div>
+            </div>
+        </div>
+    </div>
+""")
+
+# -----------------------------
+# [HOT] 1등 배너
+# -----------------------------
+HOT_BANNER = compile_template("""
+    <div class="hot-banner">
+        <div style="display:flex; align-items:center;">
+            <span class="hot-badge">HOT 🔥</span>
+            <span class="hot-text">이번 주 배당킹은 <span style="color:#0f766e;">{best_ticker}</span></span>
+        </div>
+        <span class="hot-val">{best_rate}%</span>
+    </div>
+""")
+
+# -----------------------------
+# [상세] 종목 정보 카드
+# -----------------------------
+INFO_CARD = compile_template("""
+    <div class="info-card">
+        <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom:20px;">
+            <div style="display:flex; align-items:center; gap:10px;">
+                <span class="ticker-tag">{sel_ticker}</span>
+                {risk_badge}
+            </div>
+            <span style="font-size:0.75rem; color:#888;">{name}</span>
+        </div>
+
+        <div style="text-align:center; padding: 10px 0;">
+            <div style="font-size:0.85rem; color:#0f766e; margin-bottom:6px;">1주당 확정 배당금</div>
+            <div style="font-size:2.4rem; font-weight:900; color:#0d9488; letter-spacing:-1px; line-height:1;">
+                ${div:.4f}
+            </div>
+            <div style="font-size:1.1rem; font-weight:700; margin-top:8px;">
+                <span style="color:#adb5bd;">(세전)</span> {div_krw:,.0f}원 
+                <span style="margin:0 6px; color:#ddd;">|</span> 
+                <span style="color:#0f766e;">{div_krw_net:,.0f}원 <span style="font-size:0.8rem; font-weight:500;">(세후)</span></span>
+            </div>
+        </div>
+
+        <div class="metric-grid">
+            <div class="metric-box">
+                <div class="m-title">📊 분배율(Rate)</div>
+                <div class="m-data">{rate_disp}</div>
+            </div>
+            <div class="metric-box">
+                <div class="m-title">🏦 실질수익(SEC)</div>
+                <div class="m-data">{sec_disp}</div>
+            </div>
+            <div class="metric-box">
+                <div class="m-title">↩️ 원금반환(ROC)</div>
+                <div class="m-data" style="color: #ef4444 !important;">{roc}%</div>
+            </div>
+        </div>
+
+        <div style="display:flex; justify-content:flex-end; align-items:center; gap:8px; font-size:0.75rem; color:#adb5bd; margin-top:16px;">
+            {spark}
+            <span>현재 주가 ${curr_p:.2f}{day_change} 기준{price_flag}</span>
+        </div>
+    </div>
+""")
+
+# 당일 1분봉 스파크라인 (points 는 "x,y x,y ..." 문자열)
+SPARKLINE = compile_template("""
+    <svg width="{width}" height="{height}" viewBox="0 0 {width} {height}" style="vertical-align:middle;">
+        <polyline points="{points}" fill="none" stroke="{color}" stroke-width="1.5" stroke-linejoin="round"/>
+    </svg>
+""")
+
+# 전일 종가 대비 등락률 (상승 빨강 / 하락 파랑)
+DAY_CHANGE = compile_template("""
+    <span style="color:{color}; font-weight:700; margin-left:4px;">{arrow}{pct:.2f}%</span>
+""")
+
+# -----------------------------
+# [탭1] 포트폴리오 합계
+# -----------------------------
+PORTFOLIO_CARD = compile_template("""
+    <div class="calc-card-bg" style="margin-top:10px; background:#f0fdfa; border:1px solid #ccfbf1;">
+        <div style="text-align:center;">
+            <div style="font-size:0.9rem; color:#0f766e; margin-bottom:8px; font-weight:600;">이번 주 예상 수령액 (합계)</div>
+            <div style="font-size:1.8rem; font-weight:800; color:#0d9488;">{total_post_krw:,.0f}원</div>
+            <div style="font-size:0.85rem; color:#6b7280; margin-top:4px;">(세전 {total_pre_krw:,.0f}원)</div>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 입력한 보유 종목들의 배당금 총합입니다.<br>
+        • 환율: <b>{usd_krw:,.2f}원</b> (실시간) / 세율: 15.4%
+    </div>
+""")
+
+LEDGER_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div class="calc-row">
+            <span class="calc-label">{year}년 세전 배당금</span>
+            <span class="calc-val">{pre_krw:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">세금 (15.4%)</span>
+            <span class="calc-val" style="color:#e92c2c;">-{tax_krw:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">이 중 원금반환(ROC)</span>
+            <span class="calc-val">{roc_krw:,.0f}원</span>
+        </div>
+        <div class="calc-divider"></div>
+        <div class="calc-row">
+            <span class="calc-total-label">올해 누적 입금액</span>
+            <span class="calc-total-val">{post_krw:,.0f}원</span>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 기록 기준</span>
+        • 지급일이 지난 주만, <b>지급일 환율</b>과 그때 저장된 보유 수량으로 기록합니다.<br>
+        • 처음 저장한 주부터 쌓이며, 지난 기록은 나중에 수량을 바꿔도 그대로입니다.
+    </div>
+""")
+
+
+# -----------------------------
+# [탭2] 배당금 계산기
+# -----------------------------
+DIVIDEND_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div class="calc-row">
+            <span class="calc-label">세전 배당금</span>
+            <span class="calc-val">{val_pre:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">세금 (15.4%)</span>
+            <span class="calc-val" style="color:#e92c2c;">-{val_tax:,.0f}원</span>
+        </div>
+        <div class="calc-divider"></div>
+        <div class="calc-row">
+            <span class="calc-total-label">실제 입금액</span>
+            <span class="calc-total-val">{val_post:,.0f}원</span>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 환율: <b>{usd_krw:,.2f}원</b> (실시간) / 세율: 15.4%<br>
+        • 이번 주 배당금 <b>${div:.4f}</b>가 기준입니다.
+    </div>
+""")
+
+# -----------------------------
+# [탭3] 물타기 계산기
+# -----------------------------
+AVERAGING_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div style="font-size:0.9rem; color:#666; margin-bottom:8px;">평단가 변화</div>
+        <div style="font-size:1.3rem; font-weight:700; display:flex; align-items:center; gap:8px;">
+            ${my_avg:.2f} <span style="color:#ccc;">➔</span> <span style="color:#0f766e;">${new_avg:.2f}</span>
+        </div>
+        <div style="background:#f0fdfa; border-radius:12px; padding:12px; margin-top:16px;">
+            <div style="font-size:0.85rem; color:#0f766e; font-weight:600;">🚀 탈출 기간 단축</div>
+            <div style="font-size:1rem; font-weight:700; color:#0f766e; margin-top:4px;">
+                {old_w:.1f}주 ➔ {new_w:.1f}주 <span style="color:#00c853;">(-{saved:.1f}주 단축)</span>
+            </div>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 추가 매수는 현재가 <b>${curr_p:.2f}</b> 체결 가정<br>
+        • 배당금 <b>${m_div:.4f}</b> 유지 시 단순 시뮬레이션입니다.
+    </div>
+""")
+
+# -----------------------------
+# [탭4] 스트레스 테스트
+# -----------------------------
+STRESS_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div class="calc-row" style="background:#f0fdfa; padding:8px; border-radius:8px;">
+            <span class="calc-label">⚡ 현재 유지</span>
+            <span class="calc-val" style="color:#0f766e;">{base_pay:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">📉 -10% 삭감</span>
+            <span class="calc-val">{pay_90:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">📉 -30% 삭감</span>
+            <span class="calc-val">{pay_70:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label" style="color:#e92c2c;">📉 -50% 삭감</span>
+            <span class="calc-val" style="color:#e92c2c;">{pay_50:,.0f}원</span>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • <b>세후(15.4% 공제)</b> 금액 기준입니다.<br>
+        • 배당 삭감 시나리오를 미리 확인하여 리스크를 관리하세요.
+    </div>
+""")
+
+STRESS_SIM_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div class="calc-row" style="background:#f0fdfa; padding:8px; border-radius:8px;">
+            <span class="calc-label">⚡ 현재 주간 배당</span>
+            <span class="calc-val" style="color:#0f766e;">{base_pay:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">📊 {weeks}주 후 주간 배당 (중앙값)</span>
+            <span class="calc-val">{pay_p50:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label" style="color:#e92c2c;">📉 {weeks}주 후 주간 배당 (하위 5%)</span>
+            <span class="calc-val" style="color:#e92c2c;">{pay_p5:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">💰 {weeks}주 누적 배당 (중앙값 / 하위 5%)</span>
+            <span class="calc-val">{cum_p50:,.0f} / {cum_p5:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">🏦 평가금 (현재 → 중앙값)</span>
+            <span class="calc-val">{cap_now:,.0f} → {cap_p50:,.0f}원</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label" style="color:#e92c2c;">🏦 평가금 (하위 5%)</span>
+            <span class="calc-val" style="color:#e92c2c;">{cap_p5:,.0f}원</span>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 과거 배당 {n_hist}회의 변화율(하락 추세 포함)을 그대로 뽑아 2,000개 경로를 만든 결과입니다.<br>
+        • 주가는 분배율이 유지된다고 보고 배당금과 같은 비율로 움직입니다.<br>
+        • <b>세후(15.4% 공제)</b> 금액 기준이며, 미래 수익을 보장하지 않습니다.
+    </div>
+""")
+
+# -----------------------------
+# [탭5] 원금회수 (BEP)
+# -----------------------------
+BREAKEVEN_CARD = compile_template("""
+    <div class="calc-card-bg" style="text-align:center;">
+        <div style="font-size:0.9rem; color:#666; margin-bottom:8px;">원금 회수(Free Ride)까지</div>
+        <div style="font-size:2rem; font-weight:900; color:#e92c2c; letter-spacing:-1px;">
+            {w_need:.1f}주 <span style="font-size:1rem; color:#999; font-weight:500;">(약 {m_need:.1f}개월)</span>
+        </div>
+        <div style="margin-top:12px; font-size:0.85rem; color:#d32f2f; background:#fff0f2; padding:8px; border-radius:8px;">
+            💡 <b>{w_need:.0f}번</b>만 배당 받으면 본전입니다!
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 현재 배당금 <b>${div:.4f}</b>가 앞으로도 동일하게 지급된다는 가정입니다.<br>
+        • 실제 회수 기간은 배당금 변동에 따라 달라질 수 있습니다.
+    </div>
+""")
+
+BACKTEST_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div class="calc-row" style="background:#fff0f2; padding:8px; border-radius:8px;">
+            <span class="calc-label" style="color:#d32f2f;">📉 NAV 감소 반영 회수</span>
+            <span class="calc-val" style="color:#d32f2f;">{real_text}</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">📅 상장 후 {weeks}주 · 원금 회수</span>
+            <span class="calc-val">{free_ride}</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">🏷️ 주가 변화</span>
+            <span class="calc-val">{nav_change:+.1f}%</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">💵 총수익률 (재투자 X / O)</span>
+            <span class="calc-val">{ret_hold:+.1f}% / {ret_reinv:+.1f}%</span>
+        </div>
+        <div class="calc-row">
+            <span class="calc-label">🌊 최대낙폭 (재투자 X / O)</span>
+            <span class="calc-val">-{mdd_hold:.1f}% / -{mdd_reinv:.1f}%</span>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 백테스트 기준</span>
+        • 상장 첫 주 종가에 매수했다고 보고 주간 종가와 실제 배당으로 계산했습니다.<br>
+        • NAV 감소 반영 회수는 지금까지의 주가 하락 속도만큼 배당도 줄어든다는 가정입니다.<br>
+        • 세전 기준이며, 과거 성과가 미래를 보장하지 않습니다.
+    </div>
+""")
+
+# -----------------------------
+# [탭6] FIRE (주간 목표)
+# -----------------------------
+FIRE_CARD = compile_template("""
+    <div class="calc-card-bg">
+        <div style="text-align:center; margin-bottom:16px;">
+            <div style="font-size:0.9rem; color:#666;">매주 <b style="color:#0f766e;">{target}만원</b> 받으려면?</div>
+        </div>
+        <div style="display:flex; justify-content:space-around; align-items:center;">
+            <div style="text-align:center;">
+                <div style="font-size:0.8rem; color:#888;">필요 주식</div>
+                <div style="font-size:1.2rem; font-weight:800; color:#333;">{req_shares:,}주</div>
+            </div>
+            <div style="width:1px; height:30px; background:#eee;"></div>
+            <div style="text-align:center;">
+                <div style="font-size:0.8rem; color:#888;">예상 투자금</div>
+                <div style="font-size:1.2rem; font-weight:800; color:#0f766e;">{req_money_man:,.0f}만원</div>
+            </div>
+        </div>
+    </div>
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 환율 {usd_krw:,.0f}원 / 현재가 ${curr_p:.2f} 기준<br>
+        • 세후 배당금을 기준으로 역산한 결과입니다.
+    </div>
+""")
+
+# -----------------------------
+# [탭7] 스노우볼 - 이번 주 재투자
+# -----------------------------
+SNOWBALL_CARD = compile_template("""
+    <div class="calc-card-bg" style="background:linear-gradient(135deg, #f0fdfa 0%, #fff 100%);">
+        <div style="text-align:center; margin-bottom:10px;">
+            <span style="font-size:0.9rem; color:#555;">이번 배당금으로</span><br>
+            <span style="font-size:1.5rem; font-weight:900; color:#0f766e;">+{add_cnt}주</span>
+            <span style="font-size:1rem; font-weight:700;"> 추가 매수!</span>
+        </div>
+        <div style="background:white; border-radius:12px; padding:12px; text-align:center; border:1px solid #ccfbf1;">
+            <div style="font-size:0.8rem; color:#888;">다음 주 늘어나는 배당금</div>
+            <div style="font-size:1.1rem; font-weight:800; color:#0f766e;">+{next_inc:,.0f}원 🆙</div>
+        </div>
+        <div style="text-align:center; font-size:0.75rem; color:#999; margin-top:8px;">
+            (남는 돈 {rem_cash:,.0f}원은 간식비 ☕)
+        </div>
+    </div>
+""")
+
+# -----------------------------
+# [탭7] 스노우볼 - 계산 기준
+# -----------------------------
+SNOWBALL_NOTE = compile_template("""
+    <div class="caution-box">
+        <span class="caution-header">📌 계산 기준</span>
+        • 재투자 단가: <b>${curr_p:.2f}</b> (현재가)<br>
+        • 배당금·주가 유지 가정 / 세금 납부 후 {mode_note} 시뮬레이션입니다.
+    </div>
+""")
+
+# -----------------------------
+# [가이드] 주린이 용어 설명
+# -----------------------------
+GLOSSARY = compile_template("""
+    <div style="padding:10px; font-size:0.85rem; line-height:1.6; color:#555;">
+        <p><b>1️⃣ Distribution Rate (분배율)</b><br>
+        이번 배당금을 1년 내내 똑같이 준다고 가정했을 때의 연 수익률입니다.</p>
+        <p><b>2️⃣ 30-Day SEC Yield</b><br>
+        최근 30일간 펀드가 실제로 벌어들인 이자 수익(펀더멘털)입니다.</p>
+        <p><b>3️⃣ ROC (Return of Capital)</b><br>
+        <span style="color:#e92c2c;">⚠️ 중요!</span> 펀드가 번 돈이 아니라, <b>투자 원금을 깎아서</b> 배당으로 준 비율입니다.
+        이번 Roundhill 배당은 <b>전액 ROC(100%)</b>로, 당장 세금은 없지만 평단가가 낮아집니다.</p>
+    </div>
+""")
+
+
+# ---------------------------------------------------------
+# [렌더 헬퍼] main.py 와 prerender.py 가 같은 값으로 카드를 그리도록 공유
+# ---------------------------------------------------------
+def format_age(sec):
+    if sec == float("inf"): return "수신 대기"
+    if sec < 60: return f"{sec:.0f}초 전"
+    return f"{sec // 60:.0f}분 전"
+
+# 스파크라인 / 등락률은 폴러가 분봉 버퍼에서 뽑아 스냅샷에 실어 둔 값 (추가 조회 없음)
+def sparkline_svg(values, width=96, height=24):
+    if len(values) < 2:
+        return ""
+    lo, hi = min(values), max(values)
+    span = (hi - lo) or 1.0
+    step = width / (len(values) - 1)
+    points = " ".join(f"{i * step:.1f},{height - 2 - (v - lo) / span * (height - 4):.1f}" for i, v in enumerate(values))
+    color = "#e92c2c" if values[-1] >= values[0] else "#2563eb"
+    return SPARKLINE.format(width=width, height=height, points=points, color=color)
+
+def day_change_html(pct):
+    if pct is None:
+        return ""
+    up = pct >= 0
+    return DAY_CHANGE.format(color="#e92c2c" if up else "#2563eb", arrow="▲" if up else "▼", pct=abs(pct))
+
+RISK_BADGE = "<span class='badge-safe'>🛡️ 절세/원금반환형 (ROC 100%)</span>"
+
+# INFO_CARD 에 채울 값 (d = DATA_MAP[ticker], quote = QuoteSnapshot)
+def info_card_values(ticker, d, quote, tax_rate):
+    div_krw = d['div'] * quote.fx
+    return dict(
+        sel_ticker=ticker, risk_badge=RISK_BADGE, name=d['name'], div=d['div'],
+        div_krw=div_krw, div_krw_net=div_krw * (1 - tax_rate),
+        rate_disp=f"{d['rate']}%" if d['rate'] > 0 else "-",
+        sec_disp=f"{d['sec']}%" if d['sec'] != 0 else "-",
+        roc=d['roc'], curr_p=quote.prices.get(ticker, 0.0),
+        day_change=day_change_html(quote.changes.get(ticker)),
+        spark=sparkline_svg(quote.sparks.get(ticker, [])),
+        price_flag=" (지연 시세 ⚠️)" if quote.is_stale(ticker) else "",
+    )
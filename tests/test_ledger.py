@@ -0,0 +1,60 @@
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore  # noqa: E402
+from ledger import FX_GRACE_DAYS, DividendLedger, catch_up  # noqa: E402
+from market_calendar import pay_date  # noqa: E402
+from market_data import FX_TICKER  # noqa: E402
+
+EX_DATE = date(2026, 1, 5)
+PAID = pay_date(EX_DATE)
+FX_NOW = 1380.0
+
+
+@pytest.fixture
+def books(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    ledger = DividendLedger(str(tmp_path / "portfolios.db"))
+    store.upsert_week(EX_DATE.isoformat(), {"MSTW": {"div": 0.2, "roc": 100.0}})
+    # 지급일 이틀 전 환율만 있음 (지급일 종가는 아직 동기화 전)
+    store.upsert_prices({FX_TICKER: [((PAID - timedelta(days=2)).isoformat(), 1450.0)]})
+    yield store, ledger
+    store.close()
+
+
+def run(store, ledger, today):
+    return catch_up(ledger, store, "tok", lambda: {"MSTW": 100}, EX_DATE.isoformat(), FX_NOW, today)
+
+
+def entries(ledger):
+    return ledger._conn.execute("SELECT ex_date, fx FROM ledger_entries").fetchall()
+
+
+# 지급일 당일 / 다음 날에 지급일 종가가 없으면 아무것도 기록하지 않고 커서도 그대로
+@pytest.mark.parametrize("today", [PAID, PAID + timedelta(days=1)])
+def test_waits_for_pay_date_fx(books, today):
+    store, ledger = books
+    assert run(store, ledger, today) == 0
+    assert entries(ledger) == []
+    assert ledger.totals("tok", PAID.year)["ytd"] is None
+    assert ledger.cursor("tok") < EX_DATE.isoformat()
+
+
+def test_records_exact_pay_date_close(books):
+    store, ledger = books
+    store.upsert_prices({FX_TICKER: [(PAID.isoformat(), 1420.0)]})
+    assert run(store, ledger, PAID) == 0  # 당일은 종가가 있어도 확정 전
+    assert run(store, ledger, PAID + timedelta(days=1)) == 1
+    assert entries(ledger) == [(EX_DATE.isoformat(), 1420.0)]
+    assert run(store, ledger, PAID + timedelta(days=2)) == 0
+
+
+def test_falls_back_after_grace(books):
+    store, ledger = books
+    assert run(store, ledger, PAID + timedelta(days=FX_GRACE_DAYS)) == 1
+    assert entries(ledger) == [(EX_DATE.isoformat(), 1450.0)]
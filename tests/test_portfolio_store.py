@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculators import portfolio_summary  # noqa: E402
+from portfolio_store import PortfolioStore  # noqa: E402
+
+DATA_MAP = {"MSTW": {"div": 0.2, "roc": 100.0}, "HOOW": {"div": 0.6, "roc": 50.0}}
+PRICES = {"MSTW": 20.0, "HOOW": 40.0}
+
+
+# 저장 예약 후 백그라운드 저장이 끝날 때까지 다른 저장소 인스턴스로 다시 읽어 봄
+def reload_when_saved(path, token, timeout=5.0):
+    reader = PortfolioStore(path)
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        loaded = reader.load(token)
+        if not loaded.empty:
+            return loaded
+        time.sleep(0.01)
+    raise AssertionError("저장되지 않음")
+
+
+# 편집기에서 같은 종목을 두 줄로 입력해도 다시 불러온 합계가 세션에서 보던 값과 같아야 함
+def test_duplicate_tickers_survive_reload(tmp_path):
+    path = str(tmp_path / "portfolios.db")
+    holdings = pd.DataFrame({
+        "ticker": ["MSTW", "HOOW", "MSTW", None],
+        "qty": [100.0, 10.0, 300.0, 5.0],
+        "avg_cost": [10.0, None, 20.0, 1.0],
+    })
+    store = PortfolioStore(path, save_delay=0.05)
+    store.save_later("tok", holdings)
+    reloaded = reload_when_saved(path, "tok")
+    assert sorted(zip(reloaded["ticker"], reloaded["qty"])) == [("HOOW", 10.0), ("MSTW", 400.0)]
+    assert reloaded.set_index("ticker").loc["MSTW", "avg_cost"] == 17.5
+    assert pd.isna(reloaded.set_index("ticker").loc["HOOW", "avg_cost"])
+
+    before = portfolio_summary(holdings, DATA_MAP, PRICES, 1400.0, 0.154)
+    after = portfolio_summary(reloaded, DATA_MAP, PRICES, 1400.0, 0.154)
+    for col in ("pre_krw", "post_krw", "value_krw"):
+        assert after[col].sum() == pytest.approx(before[col].sum())
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simulation import Backtest, weekly_rows  # noqa: E402
+
+TODAY = pd.Timestamp("2026-02-01")
+PRICES = {
+    "A": [(f"2026-01-{d:02d}", 10.0 + d) for d in range(1, 8)],
+    "B": [(f"2026-01-{d:02d}", 20.0) for d in range(1, 8)],
+}
+
+
+# 종가가 하나도 없는 종목(신규 상장 / 동기화 전)이 섞여 있어도 resample 이 깨지지 않아야 함
+def test_weekly_rows_with_empty_ticker():
+    rows = weekly_rows(("A", "B", "C"), PRICES, {}, today=TODAY)
+    assert [week.strftime("%Y-%m-%d") for week, _, _ in rows] == ["2026-01-02", "2026-01-09"]
+    for _, closes, divs in rows:
+        assert pd.isna(closes[2])
+        assert divs[2] == 0.0
+
+
+def test_weekly_rows_all_empty():
+    assert weekly_rows(("C",), {}, {}, today=TODAY) == []
+
+
+def test_backtest_summary_for_empty_ticker():
+    bt = Backtest(("A", "B", "C"))
+    assert bt.update(PRICES, {}, today=TODAY) == 2
+    assert bt.summary("C") is None
+    assert bt.summary("A")["weeks"] == 1
+
+
+def ms(day):
+    return int(pd.Timestamp(day).timestamp() * 1000)
+
+
+# 저장소의 get_prices(since=...) 처럼 since 이후 날짜만
+def prices_since(prices, since):
+    return {t: [p for p in points if p[0] > (since or "")] for t, points in prices.items()}
+
+
+def daily(start, days, base=20.0):
+    first = pd.Timestamp(start)
+    out = []
+    for i in range(days):
+        day = first + pd.Timedelta(days=i)
+        if day.weekday() < 5:
+            out.append((day.strftime("%Y-%m-%d"), base - 0.05 * i))
+    return out
+
+
+def full_replay(prices, dividends, today):
+    bt = Backtest(("A",))
+    bt.update(prices, dividends, today=today)
+    return bt.summary("A")
+
+
+# 이미 반영한 주의 배당 / 종가가 늦게 들어와도 다음 update 에서 다시 계산되어야 함
+def test_backtest_picks_up_late_dividend():
+    prices = {"A": daily("2026-01-05", 40)}
+    today = pd.Timestamp("2026-02-16")
+    bt = Backtest(("A",))
+    bt.update(prices_since(prices, bt.since), {}, today=today)
+    assert bt.summary("A")["recovered"] == 0
+
+    late = {"A": [(ms("2026-02-09"), 0.4)]}  # 마지막으로 반영한 주(2/13 금)의 배당이 나중에 동기화됨
+    bt.update(prices_since(prices, bt.since), late, today=today)
+    assert bt.summary("A") == full_replay(prices, late, today)
+    assert bt.summary("A")["recovered"] > 0
+
+
+def test_backtest_picks_up_late_close():
+    today = pd.Timestamp("2026-02-16")
+    complete = {"A": daily("2026-01-05", 40)}
+    partial = {"A": [p for p in complete["A"] if p[0] < "2026-02-12"]}  # 마지막 주 목 / 금 종가가 아직 없음
+    bt = Backtest(("A",))
+    bt.update(prices_since(partial, bt.since), {}, today=today)
+    bt.update(prices_since(complete, bt.since), {}, today=today)
+    assert bt.summary("A") == full_replay(complete, {}, today)
+
+
+# 매주 조금씩 update 해도 한 번에 전체를 돌린 결과와 같아야 함 (확정 지점 이동 확인)
+def test_backtest_incremental_matches_full_replay():
+    prices = {"A": daily("2026-01-05", 120)}
+    dividends = {"A": [(ms(day), 0.3) for day in pd.date_range("2026-01-05", periods=17, freq="W-MON")]}
+    end = pd.Timestamp("2026-05-04")
+    bt = Backtest(("A",))
+    for today in pd.date_range("2026-01-12", end, freq="W-MON"):
+        seen = {"A": [p for p in prices["A"] if p[0] < today.strftime("%Y-%m-%d")]}
+        bt.update(prices_since(seen, bt.since), dividends, today=today)
+    assert bt.summary("A") == full_replay(prices, dividends, end)